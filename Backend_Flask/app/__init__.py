@@ -1,27 +1,138 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 import os
 
 db = SQLAlchemy()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
 
     # 1. Enable CORS
     CORS(app)
-    
+
     # 2. Database Configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///alarms.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.urandom(24)
-    
+    if config:
+        app.config.update(config)
+
     db.init_app(app)
-    
+
+    # 3. Weather upstream deadline and cache TTL
+    from app import weather
+    weather.init_app(app)
+
     from app.routes import main_bp
     app.register_blueprint(main_bp)
-    
+
     with app.app_context():
+        # 4. SQLite pragmas (SQLITE_PROFILE: performance | default)
+        from app import storage
+        storage.init_app(app, db)
+
+        # Request / SQL / upstream instrumentation, served at /metrics
+        from app import metrics
+        metrics.init_app(app, db)
+
+        # The compaction module registers the archive tables, which the routes do
+        # not import; they must be known before create_all()
+        from app import compaction
         db.create_all()
-    
-    return app 
\ No newline at end of file
+        added = _add_columns()
+        _seed_change_log()
+        _add_indexes()
+        if ('alarm', 'next_fire_at') in added:
+            _backfill_next_fire()
+
+        # Full-text memo index (FTS5, kept in sync by triggers)
+        from app import search
+        search.init_app(app)
+
+        from app.revision import revisions
+        revisions.load()
+
+    # 5. Background compaction of expired temp alarms / dated memos
+    compaction.init_app(app)
+
+    # 6. gzip response compression (Accept-Encoding, COMPRESS_MIN_SIZE)
+    from app import compression
+    compression.init_app(app)
+
+    return app
+
+
+def _add_columns():
+    # create_all() only creates missing tables, so columns added to an existing
+    # table (e.g. an alarms.db from an older version) are created here.
+    # Returns the (table, column) pairs that were added.
+    inspector = inspect(db.engine)
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            columns = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    col_type = column.type.compile(dialect=db.engine.dialect)
+                    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'
+                    if column.server_default is not None:
+                        ddl += f" DEFAULT '{column.server_default.arg}'"
+                        if not column.nullable:
+                            ddl += ' NOT NULL'
+                    conn.execute(text(ddl))
+                    added.append((table.name, column.name))
+    return added
+
+
+def _add_indexes():
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    if index.unique:
+                        _drop_duplicates(conn, table, index)
+                    index.create(conn)
+
+
+def _drop_duplicates(conn, table, index):
+    # A unique index can only be built once older duplicate rows are gone.
+    # The oldest row of each group is kept; the others are logged as deleted.
+    columns = ', '.join(column.name for column in index.columns)
+    not_null = ' AND '.join(f'{column.name} IS NOT NULL' for column in index.columns)
+    duplicates = (f"SELECT id FROM {table.name} WHERE {not_null} AND id NOT IN "
+                  f"(SELECT MIN(id) FROM {table.name} WHERE {not_null} GROUP BY {columns})")
+    from app.revision import TRACKED_TABLES
+    if table.name in TRACKED_TABLES:
+        conn.execute(text(
+            f"INSERT INTO change_log (table_name, row_id, device_id, op, created_at) "
+            f"SELECT '{table.name}', id, device_id, 'delete', CURRENT_TIMESTAMP "
+            f"FROM {table.name} WHERE id IN ({duplicates})"
+        ))
+    conn.execute(text(f"DELETE FROM {table.name} WHERE id IN ({duplicates})"))
+
+
+def _backfill_next_fire():
+    from app.models.alarm import Alarm
+    for alarm in Alarm.query.all():
+        alarm.refresh_next_fire()
+    db.session.commit()
+
+
+def _seed_change_log():
+    # Rows written before the change log existed are recorded once as upserts,
+    # so that a device syncing from revision 0 still receives them.
+    from app.models.change_log import ChangeLog
+    from app.revision import TRACKED_TABLES
+    if db.session.query(ChangeLog.id).first() is not None:
+        return
+    for table in TRACKED_TABLES:
+        db.session.execute(text(
+            f"INSERT INTO change_log (table_name, row_id, device_id, op, created_at) "
+            f"SELECT '{table}', id, device_id, 'upsert', CURRENT_TIMESTAMP FROM {table} ORDER BY id"
+        ))
+    db.session.commit()
+
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from app import db
+from app.models.alarm import Alarm, Memo
+from app.models.archive import AlarmArchive, MemoArchive
+from app.models.change_log import ChangeLog, ChangeLogHorizon
+
+# Background compaction of rows whose date has passed:
+# - temporary alarms (specific_date) and dated memos (date) older than
+#   COMPACTION_RETENTION_DAYS are moved to the archive tables
+#   (COMPACTION_MODE=archive) or deleted (COMPACTION_MODE=delete), in batches
+#   of COMPACTION_BATCH_SIZE rows per transaction
+# - change log entries older than CHANGE_LOG_RETENTION_DAYS are pruned
+# - freed pages are returned to the filesystem with an incremental VACUUM
+# Deletes go through the ORM, so devices receive them as tombstones.
+# Runs every COMPACTION_INTERVAL seconds (0 disables the job).
+
+
+def init_app(app):
+    app.config.setdefault('COMPACTION_INTERVAL', int(os.environ.get('COMPACTION_INTERVAL', 3600)))
+    app.config.setdefault('COMPACTION_RETENTION_DAYS', int(os.environ.get('COMPACTION_RETENTION_DAYS', 7)))
+    app.config.setdefault('COMPACTION_MODE', os.environ.get('COMPACTION_MODE', 'archive'))
+    app.config.setdefault('COMPACTION_BATCH_SIZE', int(os.environ.get('COMPACTION_BATCH_SIZE', 500)))
+    app.config.setdefault('CHANGE_LOG_RETENTION_DAYS', int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 30)))
+    if app.config['COMPACTION_MODE'] not in ('archive', 'delete'):
+        raise ValueError(f"Unknown COMPACTION_MODE '{app.config['COMPACTION_MODE']}' (archive or delete)")
+
+    if app.config['COMPACTION_INTERVAL'] > 0:
+        threading.Thread(target=_run_forever, args=(app,), daemon=True, name='compaction').start()
+
+
+def _run_forever(app):
+    # First pass shortly after startup, then on every interval
+    delay = min(60, app.config['COMPACTION_INTERVAL'])
+    while True:
+        time.sleep(delay)
+        with app.app_context():
+            try:
+                result = compact(app.config)
+                if any(result.values()):
+                    print(f"[Compaction] {result}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"[Compaction Error] {e}")
+        delay = app.config['COMPACTION_INTERVAL']
+
+
+def compact(config, today=None):
+    # Must run inside an app context; returns the number of rows handled per kind
+    today = today or date.today()
+    cutoff = today - timedelta(days=config['COMPACTION_RETENTION_DAYS'])
+    archive = config['COMPACTION_MODE'] == 'archive'
+    batch_size = config['COMPACTION_BATCH_SIZE']
+
+    result = {}
+    for name, model, archive_model, date_column in (
+        ('alarms', Alarm, AlarmArchive, Alarm.specific_date),
+        ('memos', Memo, MemoArchive, Memo.date),
+    ):
+        count = 0
+        while True:
+            rows = model.query.filter(date_column < cutoff).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            if archive:
+                db.session.add_all([archive_model.from_row(row) for row in rows])
+            for row in rows:
+                db.session.delete(row)
+            db.session.commit()
+            count += len(rows)
+        result[name] = count
+
+    # The newest entry of each device is always kept: it carries the
+    # device's current revision
+    log_cutoff = datetime.utcnow() - timedelta(days=config['CHANGE_LOG_RETENTION_DAYS'])
+    latest = db.session.query(func.max(ChangeLog.id)).group_by(ChangeLog.device_id)
+    prunable = ChangeLog.query.filter(ChangeLog.created_at < log_cutoff, ChangeLog.id.notin_(latest))
+    horizons = (prunable.with_entities(ChangeLog.device_id, func.max(ChangeLog.id))
+                .group_by(ChangeLog.device_id).all())
+    for device_id, pruned_through in horizons:
+        db.session.merge(ChangeLogHorizon(device_id=device_id, pruned_through=pruned_through))
+    result['change_log'] = prunable.delete(synchronize_session=False)
+    db.session.commit()
+
+    if any(result.values()):
+        _incremental_vacuum()
+    return result
+
+
+def _incremental_vacuum():
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        # auto_vacuum can only change with a full VACUUM; done once per database
+        if conn.exec_driver_sql('PRAGMA auto_vacuum').scalar() != 2:
+            conn.exec_driver_sql('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.exec_driver_sql('VACUUM')
+        conn.exec_driver_sql('PRAGMA incremental_vacuum')
@@ -0,0 +1,37 @@
+import gzip
+import os
+from flask import request
+
+# gzip for clients that send Accept-Encoding: gzip (requests does by default).
+# Only textual bodies of at least COMPRESS_MIN_SIZE bytes are compressed: below
+# that the gzip header and CPU time outweigh the saving.
+# A compressed body is a different representation, so its ETag becomes weak;
+# If-None-Match checks in routes.py use weak comparison and keep matching.
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def init_app(app):
+    app.config.setdefault('COMPRESS_MIN_SIZE', int(os.environ.get('COMPRESS_MIN_SIZE', 500)))
+    app.config.setdefault('COMPRESS_LEVEL', int(os.environ.get('COMPRESS_LEVEL', 6)))
+
+    @app.after_request
+    def _compress(response):
+        if (response.mimetype not in COMPRESSIBLE_TYPES
+                or response.direct_passthrough
+                or not 200 <= response.status_code < 300
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if not request.accept_encodings.quality('gzip'):
+            return response
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,176 @@
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# In-process request instrumentation, exported in the Prometheus text format
+# at GET /metrics:
+# - latency histogram per (route, method, status); its _count is the request count
+# - SQL queries and time spent in SQLite per (route, method, status), through
+#   SQLAlchemy cursor events, plus a per-query latency histogram per route
+# - Open-Meteo call latency and errors per upstream
+# Routes are labelled with their URL rule (/api/alarms/<int:alarm_id>), not the
+# raw path, so that the number of series stays bounded.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label for queries run outside a request (compaction, startup)
+NO_ROUTE = '(background)'
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}        # (route, method, status) -> Histogram
+        self.db_queries = {}      # (route, method, status) -> count
+        self.db_seconds = {}      # (route, method, status) -> seconds
+        self.queries = {}         # (route,) -> Histogram of single queries
+        self.upstream = {}        # (upstream, outcome) -> Histogram
+        self.upstream_errors = {}  # (upstream, error) -> count
+
+    def observe_request(self, route, method, status, seconds, queries, query_seconds):
+        key = (route, method, str(status))
+        with self._lock:
+            self.requests.setdefault(key, Histogram()).observe(seconds)
+            self.db_queries[key] = self.db_queries.get(key, 0) + queries
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + query_seconds
+
+    def observe_query(self, route, seconds):
+        with self._lock:
+            self.queries.setdefault((route,), Histogram()).observe(seconds)
+
+    def observe_upstream(self, upstream, seconds, error=None):
+        outcome = 'ok' if error is None else 'error'
+        with self._lock:
+            self.upstream.setdefault((upstream, outcome), Histogram()).observe(seconds)
+            if error is not None:
+                key = (upstream, type(error).__name__)
+                self.upstream_errors[key] = self.upstream_errors.get(key, 0) + 1
+
+    def render(self, extra=()):
+        # extra: (name, type, help, {labels tuple: value}, label names) families
+        # appended after the built-in ones (e.g. weather cache counters)
+        with self._lock:
+            families = [
+                ('http_request_duration_seconds', 'histogram', 'Request latency',
+                 dict(self.requests), ('route', 'method', 'status')),
+                ('http_request_db_queries_total', 'counter', 'SQL queries run by requests',
+                 dict(self.db_queries), ('route', 'method', 'status')),
+                ('http_request_db_seconds_total', 'counter', 'Time requests spent in SQL queries',
+                 dict(self.db_seconds), ('route', 'method', 'status')),
+                ('db_query_duration_seconds', 'histogram', 'Latency of single SQL queries',
+                 dict(self.queries), ('route',)),
+                ('upstream_request_duration_seconds', 'histogram', 'Open-Meteo request latency',
+                 dict(self.upstream), ('upstream', 'outcome')),
+                ('upstream_errors_total', 'counter', 'Failed Open-Meteo requests',
+                 dict(self.upstream_errors), ('upstream', 'error')),
+            ]
+            # Histograms are copied under the lock, so a scrape sees consistent buckets
+            families = [(name, kind, help_text,
+                         {key: _copy(value) for key, value in series.items()}, labels)
+                        for name, kind, help_text, series, labels in families]
+
+        lines = []
+        for name, kind, help_text, series, label_names in list(families) + list(extra):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(series.items()):
+                labels = _labels(zip(label_names, key))
+                if kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(zip(label_names, key), le=_number(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(zip(label_names, key), le='+Inf')} {value.count}")
+                    lines.append(f"{name}_sum{labels} {_number(value.sum)}")
+                    lines.append(f"{name}_count{labels} {value.count}")
+                else:
+                    lines.append(f"{name}{labels} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(value):
+    if isinstance(value, Histogram):
+        copy = Histogram(value.buckets)
+        copy.counts = list(value.counts)
+        copy.sum = value.sum
+        copy.count = value.count
+        return copy
+    return value
+
+
+def _labels(pairs, **more):
+    pairs = list(pairs) + list(more.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+
+
+def init_app(app, db):
+    # Must run inside an app context (hooks the engine of this app)
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_query_seconds = 0.0
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            metrics.observe_request(_route(), request.method, response.status_code,
+                                    time.perf_counter() - start,
+                                    g.get('metrics_queries', 0), g.get('metrics_query_seconds', 0.0))
+        return response
+
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(db.engine, 'after_cursor_execute')
+    def _record_query(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        if has_request_context() and 'metrics_start' in g:
+            g.metrics_queries += 1
+            g.metrics_query_seconds += seconds
+            metrics.observe_query(_route(), seconds)
+        else:
+            metrics.observe_query(NO_ROUTE, seconds)
+
+    @event.listens_for(db.engine, 'handle_error')
+    def _forget_query(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        starts = exception_context.connection.info.get('metrics_query_start') if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else '(unmatched)'
@@ -1,14 +1,57 @@
 from app import db
-from datetime import datetime
+from datetime import datetime, timedelta
 
+# Rows written without a device (older databases, the web page, clients that
+# send no X-Device-ID) belong to this device
+DEFAULT_DEVICE = 'default'
+
+# Every query is scoped to one device, so every index leads with device_id
 class Alarm(db.Model):
+    __table_args__ = (
+        # Serves the active/kind/from_date filters of GET /api/alarms
+        db.Index('ix_alarm_device_active_date', 'device_id', 'is_active', 'specific_date'),
+        # One temporary alarm per (device, time, date); regular alarms have no
+        # date, and NULLs never collide in a SQLite unique index
+        db.Index('uq_alarm_device_time_date', 'device_id', 'time', 'specific_date', unique=True),
+        # ORDER BY next_fire_at of GET /api/alarms/next
+        db.Index('ix_alarm_device_next_fire', 'device_id', 'next_fire_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.String(64), nullable=False, default=DEFAULT_DEVICE, server_default=DEFAULT_DEVICE)
     time = db.Column(db.String(5), nullable=False)  # Format: HH:MM
     label = db.Column(db.String(100))
     days = db.Column(db.String(20))  # Day info (e.g., "0,1,2,3,4")
     specific_date = db.Column(db.Date)  # For specific dates
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_fire_at = db.Column(db.DateTime)  # Local time, None if it will not fire again
+
+    def compute_next_fire(self, after):
+        # Days use datetime.weekday() numbering (Monday=0), as on the Raspberry Pi
+        if not self.is_active:
+            return None
+        try:
+            hour, minute = (int(part) for part in self.time.split(':'))
+        except (AttributeError, ValueError):
+            return None
+
+        if self.specific_date:
+            d = self.specific_date
+            fire_at = datetime(d.year, d.month, d.day, hour, minute)
+            return fire_at if fire_at > after else None
+
+        days = {int(day) for day in (self.days or '').split(',') if day.strip().isdigit()}
+        for offset in range(8):
+            d = after.date() + timedelta(days=offset)
+            if d.weekday() in days:
+                fire_at = datetime(d.year, d.month, d.day, hour, minute)
+                if fire_at > after:
+                    return fire_at
+        return None
+
+    def refresh_next_fire(self, after=None):
+        self.next_fire_at = self.compute_next_fire(after or datetime.now())
 
     def to_dict(self):
         return {
@@ -17,11 +60,19 @@ class Alarm(db.Model):
             'label': self.label,
             'days': self.days,
             'specific_date': self.specific_date.strftime('%Y-%m-%d') if self.specific_date else None,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            'next_fire_at': self.next_fire_at.strftime('%Y-%m-%d %H:%M:%S') if self.next_fire_at else None
         }
 
 class Memo(db.Model):
+    __table_args__ = (
+        # Keyset pagination order of GET /api/memos
+        db.Index('ix_memo_device_created_id', 'device_id', 'created_at', 'id'),
+        db.Index('ix_memo_device_date', 'device_id', 'date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.String(64), nullable=False, default=DEFAULT_DEVICE, server_default=DEFAULT_DEVICE)
     content = db.Column(db.Text, nullable=False)
     date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
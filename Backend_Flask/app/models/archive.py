@@ -0,0 +1,40 @@
+from app import db
+from datetime import datetime
+
+# Expired rows moved out of the hot tables by app/compaction.py
+# (COMPACTION_MODE=archive). original_id is the id the row had in the hot
+# table (SQLite may hand that id out again later, so it is not the key here).
+class AlarmArchive(db.Model):
+    __tablename__ = 'alarm_archive'
+
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer, nullable=False)
+    device_id = db.Column(db.String(64))
+    time = db.Column(db.String(5), nullable=False)
+    label = db.Column(db.String(100))
+    days = db.Column(db.String(20))
+    specific_date = db.Column(db.Date)
+    is_active = db.Column(db.Boolean)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def from_row(cls, alarm):
+        return cls(original_id=alarm.id, device_id=alarm.device_id, time=alarm.time, label=alarm.label, days=alarm.days,
+                   specific_date=alarm.specific_date, is_active=alarm.is_active,
+                   created_at=alarm.created_at)
+
+class MemoArchive(db.Model):
+    __tablename__ = 'memo_archive'
+
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer, nullable=False)
+    device_id = db.Column(db.String(64))
+    content = db.Column(db.Text, nullable=False)
+    date = db.Column(db.Date)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def from_row(cls, memo):
+        return cls(original_id=memo.id, device_id=memo.device_id, content=memo.content, date=memo.date, created_at=memo.created_at)
@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime
+from app.models.alarm import DEFAULT_DEVICE
+
+# One row per insert/update/delete of a synced table, written in the same
+# transaction as the change itself. The id doubles as the global revision
+# used by /api/changes?since=<rev> (AUTOINCREMENT keeps ids from being reused);
+# a device only sees the entries of its own rows.
+class ChangeLog(db.Model):
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        db.Index('ix_change_log_device_id', 'device_id', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.String(64), nullable=False, default=DEFAULT_DEVICE, server_default=DEFAULT_DEVICE)
+    table_name = db.Column(db.String(20), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # 'upsert' or 'delete'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Highest change log id pruned per device (written by app/compaction.py).
+# A device asking for changes since an older revision may have missed some,
+# so it gets a full snapshot instead.
+class ChangeLogHorizon(db.Model):
+    __tablename__ = 'change_log_horizon'
+
+    device_id = db.Column(db.String(64), primary_key=True)
+    pruned_through = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,19 @@
+from app import db
+from datetime import datetime
+
+# Per-device settings, edited through /api/device. A device without a row (or
+# without coordinates) uses the WEATHER_LATITUDE / WEATHER_LONGITUDE defaults.
+class DeviceSettings(db.Model):
+    __tablename__ = 'device_settings'
+
+    device_id = db.Column(db.String(64), primary_key=True)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'device_id': self.device_id,
+            'latitude': self.latitude,
+            'longitude': self.longitude
+        }
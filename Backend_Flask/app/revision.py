@@ -0,0 +1,123 @@
+import threading
+import uuid
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models.alarm import DEFAULT_DEVICE
+from app.models.change_log import ChangeLog
+
+# Tables whose writes are recorded in the change log
+TRACKED_TABLES = ('alarm', 'memo')
+
+
+# Latest change log id per (device, table), advanced after every commit that
+# writes to it. List routes turn it into an ETag so that an unchanged table can
+# be answered with 304 without touching the database.
+# The epoch changes on every restart, so ETags from a previous process never match.
+# wait() lets long-poll requests sleep until the next commit advances a
+# revision of their device. Each device with waiters has its own condition on
+# the shared lock, so writes of other devices do not wake them.
+class RevisionTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revisions = {}
+        self._waiters = {}  # device_id -> [condition, number of waiting requests]
+        self.epoch = uuid.uuid4().hex[:8]
+
+    def load(self):
+        # Called once at startup, inside an app context
+        rows = (db.session.query(ChangeLog.device_id, ChangeLog.table_name, func.max(ChangeLog.id))
+                .group_by(ChangeLog.device_id, ChangeLog.table_name).all())
+        with self._lock:
+            for device_id, table, revision in rows:
+                key = (device_id, table)
+                self._revisions[key] = max(self._revisions.get(key, 0), revision)
+
+    def current(self, device_id):
+        with self._lock:
+            return self._current(device_id)
+
+    def _current(self, device_id):
+        return max((self._revisions.get((device_id, table), 0) for table in TRACKED_TABLES), default=0)
+
+    def wait(self, device_id, since, timeout):
+        # Returns the current revision as soon as it differs from `since`,
+        # or after `timeout` seconds with no change
+        with self._lock:
+            waiters = self._waiters.get(device_id)
+            if waiters is None:
+                waiters = self._waiters[device_id] = [threading.Condition(self._lock), 0]
+            waiters[1] += 1
+            try:
+                waiters[0].wait_for(lambda: self._current(device_id) != since, timeout)
+            finally:
+                waiters[1] -= 1
+                if not waiters[1]:
+                    del self._waiters[device_id]
+            return self._current(device_id)
+
+    def get(self, device_id, table):
+        with self._lock:
+            return self._revisions.get((device_id, table), 0)
+
+    def advance(self, changes):
+        # changes: {(device_id, table): revision}
+        with self._lock:
+            for key, revision in changes.items():
+                self._revisions[key] = max(self._revisions.get(key, 0), revision)
+            for device_id in {device_id for device_id, _ in changes}:
+                waiters = self._waiters.get(device_id)
+                if waiters:
+                    waiters[0].notify_all()
+
+    def etag(self, device_id, *tables):
+        with self._lock:
+            parts = [f"{table}{self._revisions.get((device_id, table), 0)}" for table in tables]
+        return f"{self.epoch}-{device_id}-" + "-".join(parts)
+
+
+revisions = RevisionTracker()
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    entries = []
+    for obj in session.new:
+        if getattr(obj, '__tablename__', None) in TRACKED_TABLES:
+            entries.append(_entry(obj, 'upsert'))
+    for obj in session.dirty:
+        if getattr(obj, '__tablename__', None) in TRACKED_TABLES and session.is_modified(obj):
+            entries.append(_entry(obj, 'upsert'))
+    for obj in session.deleted:
+        if getattr(obj, '__tablename__', None) in TRACKED_TABLES:
+            entries.append(_entry(obj, 'delete'))
+    if not entries:
+        return
+
+    conn = session.connection()
+    conn.execute(insert(ChangeLog), entries)
+    revision = conn.execute(select(func.max(ChangeLog.id))).scalar()
+    changed = session.info.setdefault('changed_tables', {})
+    for entry in entries:
+        changed[(entry['device_id'], entry['table_name'])] = revision
+
+
+def _entry(obj, op):
+    return {
+        'table_name': obj.__tablename__,
+        'row_id': obj.id,
+        'device_id': obj.device_id or DEFAULT_DEVICE,
+        'op': op
+    }
+
+
+@event.listens_for(Session, 'after_commit')
+def _advance_revisions(session):
+    changed = session.info.pop('changed_tables', None)
+    if changed:
+        revisions.advance(changed)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_changes(session, previous_transaction):
+    session.info.pop('changed_tables', None)
@@ -1,11 +1,33 @@
-from flask import Blueprint, render_template, request, jsonify
-from app.models.alarm import Alarm, Memo
+from flask import Blueprint, current_app, render_template, request, jsonify, make_response, g
+from app.models.alarm import Alarm, Memo, DEFAULT_DEVICE
+from app.models.change_log import ChangeLog, ChangeLogHorizon
+from app.models.device import DeviceSettings
 from app import db
+from app.revision import revisions, TRACKED_TABLES
+from app.search import search_memos
+from app.serializers import ALARM_COLUMNS, MEMO_COLUMNS, fetch_dicts, json_response, project, select_fields
+from app.weather import weather_cache, grid_cell
+from app.metrics import metrics
 from datetime import datetime
-import requests
+from sqlalchemy import String, func, tuple_, type_coerce
+from sqlalchemy.exc import IntegrityError
+import base64
+import math
+import re
 
 main_bp = Blueprint('main', __name__)
 
+# Every API call works on the data of one device, identified by the
+# X-Device-ID header (or ?device=); requests without one use the default device
+DEVICE_ID_PATTERN = re.compile(r'[A-Za-z0-9._:-]{1,64}')
+
+@main_bp.before_request
+def _load_device():
+    device_id = request.headers.get('X-Device-ID') or request.args.get('device') or DEFAULT_DEVICE
+    if not DEVICE_ID_PATTERN.fullmatch(device_id):
+        return jsonify({'error': 'Invalid device id'}), 400
+    g.device_id = device_id
+
 # ----------------------------
 # 1. Main Page
 # ----------------------------
@@ -19,43 +41,124 @@ def index():
 # ----------------------------
 @main_bp.route('/api/alarms', methods=['GET'])
 def get_alarms():
-    alarms = Alarm.query.all()
-    return jsonify([alarm.to_dict() for alarm in alarms])
+    # Optional filters: kind=regular|temp, active=0|1, weekday=0-6,
+    # from_date=YYYY-MM-DD, limit=N (all of them run in SQL);
+    # fields=time,label,... limits the returned columns (id is always included)
+    etag = revisions.etag(g.device_id, 'alarm')
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+
+    columns, error = _fields(ALARM_COLUMNS)
+    if error:
+        return error
+
+    query = _alarms()
+
+    kind = request.args.get('kind')
+    if kind == 'regular':
+        query = query.filter(Alarm.specific_date.is_(None))
+    elif kind == 'temp':
+        query = query.filter(Alarm.specific_date.isnot(None))
+    elif kind is not None:
+        return jsonify({'error': 'Invalid kind'}), 400
+
+    if 'active' in request.args:
+        active = _parse_bool(request.args.get('active'))
+        if active is None:
+            return jsonify({'error': 'Invalid active'}), 400
+        query = query.filter(Alarm.is_active.is_(active))
+
+    if 'from_date' in request.args:
+        from_date = _parse_date(request.args.get('from_date'))
+        if from_date is None:
+            return jsonify({'error': 'Invalid from_date'}), 400
+        query = query.filter(Alarm.specific_date >= from_date)
+
+    if 'weekday' in request.args:
+        weekday = request.args.get('weekday')
+        if weekday not in [str(d) for d in range(7)]:
+            return jsonify({'error': 'Invalid weekday'}), 400
+        query = query.filter(_on_weekday(weekday))
+
+    if kind == 'temp':
+        # Upcoming first, so that limit=1 returns the next temporary alarm
+        query = query.order_by(Alarm.specific_date, Alarm.time, Alarm.id)
+    else:
+        query = query.order_by(Alarm.id)
+
+    if 'limit' in request.args:
+        limit = _parse_limit(request.args.get('limit'))
+        if limit is None:
+            return jsonify({'error': 'Invalid limit'}), 400
+        query = query.limit(limit)
+
+    response = json_response(fetch_dicts(query, columns))
+    response.set_etag(etag)
+    return response
 
 @main_bp.route('/api/alarms', methods=['POST'])
 def create_alarm():
-    data = request.json
-    alarm = Alarm(
-        time=data['time'],
-        label=data.get('label'),
-        days=data.get('days'),
-        specific_date=_parse_date(data.get('specific_date')),
-        is_active=True
-    )
+    alarm = _new_alarm(request.json)
+    if alarm is None:
+        return jsonify({'error': 'Invalid input'}), 400
     db.session.add(alarm)
-    db.session.commit()
+    if not _commit_alarms():
+        return jsonify({'error': 'An alarm with this time and date already exists'}), 409
     return jsonify(alarm.to_dict()), 201
 
 @main_bp.route('/api/alarms/<int:alarm_id>', methods=['PUT'])
 def update_alarm(alarm_id):
-    alarm = Alarm.query.get_or_404(alarm_id)
-    data = request.json
-    alarm.time = data.get('time', alarm.time)
-    alarm.label = data.get('label', alarm.label)
-    alarm.days = data.get('days', alarm.days)
-    alarm.specific_date = _parse_date(data.get('specific_date')) or alarm.specific_date
-    alarm.is_active = data.get('is_active', alarm.is_active)
+    alarm = _alarms().filter_by(id=alarm_id).first_or_404()
+    if not _update_alarm(alarm, request.json):
+        return jsonify({'error': 'Invalid input'}), 400
+    if not _commit_alarms():
+        return jsonify({'error': 'An alarm with this time and date already exists'}), 409
+    return jsonify(alarm.to_dict())
+
+# Several creates/updates/deletes in one transaction, with a result per item
+@main_bp.route('/api/alarms/batch', methods=['POST'])
+def batch_alarms():
+    return _apply_batch(Alarm, _new_alarm, _update_alarm,
+                        conflict='Batch would duplicate an alarm time and date; nothing was applied')
+
+# Upcoming firings, earliest first (ORDER BY next_fire_at LIMIT n on an index)
+@main_bp.route('/api/alarms/next', methods=['GET'])
+def get_next_alarms():
+    limit = _parse_limit(request.args.get('limit', '1'))
+    if limit is None:
+        return jsonify({'error': 'Invalid limit'}), 400
+
+    kind = request.args.get('kind')
+    if kind not in (None, 'regular', 'temp'):
+        return jsonify({'error': 'Invalid kind'}), 400
+
+    columns, error = _fields(ALARM_COLUMNS)
+    if error:
+        return error
+
+    alarms = _upcoming_alarms(kind, limit)
+    return jsonify(project([alarm.to_dict() for alarm in alarms], columns))
+
+# Reported by a device after the alarm rang, to schedule its next firing
+@main_bp.route('/api/alarms/<int:alarm_id>/fired', methods=['POST'])
+def alarm_fired(alarm_id):
+    alarm = _alarms().filter_by(id=alarm_id).first_or_404()
+    now = datetime.now()
+    # A device clock running slightly ahead must not fire the same slot twice
+    alarm.refresh_next_fire(max(now, alarm.next_fire_at or now))
     db.session.commit()
     return jsonify(alarm.to_dict())
 
 @main_bp.route('/api/alarms/<int:alarm_id>', methods=['DELETE'])
 def delete_alarm(alarm_id):
-    alarm = Alarm.query.get_or_404(alarm_id)
+    alarm = _alarms().filter_by(id=alarm_id).first_or_404()
     db.session.delete(alarm)
     db.session.commit()
     return '', 204
 
 # Temporary Alarm Creation (with specific date only)
+# Idempotent: (time, specific_date) is unique per device, so repeated toggles reuse the
+# existing row (200) instead of inserting a duplicate (201 only when created).
 @main_bp.route('/api/alarms/temp', methods=['POST'])
 def create_temp_alarm():
     data = request.json
@@ -64,10 +167,22 @@ def create_temp_alarm():
     if not time or not date:
         return jsonify({'error': 'Invalid input'}), 400
 
-    temp_alarm = Alarm(time=time, specific_date=date, is_active=True)
-    db.session.add(temp_alarm)
-    db.session.commit()
-    return jsonify(temp_alarm.to_dict()), 201
+    temp_alarm = _alarms().filter_by(time=time, specific_date=date).first()
+    created = temp_alarm is None
+    if created:
+        temp_alarm = Alarm(device_id=g.device_id, time=time, specific_date=date, is_active=True)
+        db.session.add(temp_alarm)
+    else:
+        temp_alarm.is_active = True
+    temp_alarm.refresh_next_fire()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request inserted the same alarm first
+        db.session.rollback()
+        temp_alarm = _alarms().filter_by(time=time, specific_date=date).first()
+        created = False
+    return jsonify(temp_alarm.to_dict()), 201 if created else 200
 
 # Temporary Alarm Deletion
 @main_bp.route('/api/alarms/temp', methods=['DELETE'])
@@ -78,11 +193,12 @@ def delete_temp_alarm():
     if not time or not date:
         return jsonify({'error': 'Invalid input'}), 400
 
-    alarm = Alarm.query.filter_by(time=time, specific_date=date).first()
-    if alarm:
-        db.session.delete(alarm)
+    alarms = _alarms().filter_by(time=time, specific_date=date).all()
+    if alarms:
+        for alarm in alarms:
+            db.session.delete(alarm)
         db.session.commit()
-        return jsonify({'message': 'Deleted'}), 200
+        return jsonify({'message': 'Deleted', 'count': len(alarms)}), 200
     else:
         return jsonify({'error': 'Not found'}), 404
 
@@ -92,32 +208,148 @@ def delete_temp_alarm():
 # ----------------------------
 @main_bp.route('/api/memos', methods=['GET'])
 def get_memos():
-    memos = Memo.query.all()
-    return jsonify([memo.to_dict() for memo in memos])
+    etag = revisions.etag(g.device_id, 'memo')
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+
+    # Optional filters: kind=regular|dated, date=YYYY-MM-DD, from_date=YYYY-MM-DD.
+    # Ordered by (created_at, id); order=desc returns the newest first.
+    # fields=content,date,... limits the returned columns (id is always included)
+    columns, error = _fields(MEMO_COLUMNS)
+    if error:
+        return error
+
+    query = _memos()
+
+    kind = request.args.get('kind')
+    if kind == 'regular':
+        query = query.filter(Memo.date.is_(None))
+    elif kind == 'dated':
+        query = query.filter(Memo.date.isnot(None))
+    elif kind is not None:
+        return jsonify({'error': 'Invalid kind'}), 400
+
+    if 'date' in request.args:
+        date = _parse_date(request.args.get('date'))
+        if date is None:
+            return jsonify({'error': 'Invalid date'}), 400
+        query = query.filter(Memo.date == date)
+
+    if 'from_date' in request.args:
+        from_date = _parse_date(request.args.get('from_date'))
+        if from_date is None:
+            return jsonify({'error': 'Invalid from_date'}), 400
+        query = query.filter(Memo.date >= from_date)
+
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': 'Invalid order'}), 400
+    key = tuple_(Memo.created_at, Memo.id)
+
+    # Without limit/after the whole (filtered) list is returned as before
+    if 'limit' not in request.args and 'after' not in request.args:
+        memos = fetch_dicts(query.order_by(Memo.created_at, Memo.id), columns)
+        if order == 'desc':
+            memos.reverse()
+        response = json_response(memos)
+        response.set_etag(etag)
+        return response
+
+    # Keyset pagination: {"memos": [...], "next_cursor": "..."}; pass
+    # next_cursor back as `after` for the following page (null on the last one)
+    limit = _parse_limit(request.args.get('limit', '50'))
+    if limit is None:
+        return jsonify({'error': 'Invalid limit'}), 400
+    if request.args.get('after'):
+        cursor = _decode_cursor(request.args.get('after'))
+        if cursor is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(key < tuple_(*cursor) if order == 'desc' else key > tuple_(*cursor))
+
+    if order == 'desc':
+        query = query.order_by(Memo.created_at.desc(), Memo.id.desc())
+    else:
+        query = query.order_by(Memo.created_at, Memo.id)
+    # The raw created_at (with microseconds) is selected for the cursor only
+    memos = fetch_dicts(query.limit(limit + 1), {**columns, 'cursor_key': type_coerce(Memo.created_at, String)})
+
+    next_cursor = None
+    if len(memos) > limit:
+        memos = memos[:limit]
+        next_cursor = _encode_cursor(memos[-1]['cursor_key'], memos[-1]['id'])
+    for memo in memos:
+        del memo['cursor_key']
+
+    response = json_response({
+        'memos': memos,
+        'next_cursor': next_cursor
+    })
+    response.set_etag(etag)
+    return response
+
+@main_bp.route('/api/memos/search', methods=['GET'])
+def search_memo():
+    # q: words to look for (each matched as a word prefix), best match first.
+    # Returns {"memos": [...], "next_offset": N|null}; every memo carries a
+    # `snippet` with the matched words wrapped in [ ]. Supports fields= as well.
+    etag = revisions.etag(g.device_id, 'memo')
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified(etag)
+
+    columns, error = _fields({**MEMO_COLUMNS, 'snippet': None})
+    if error:
+        return error
+
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Missing q'}), 400
+    limit = _parse_limit(request.args.get('limit', '20'), maximum=100)
+    if limit is None:
+        return jsonify({'error': 'Invalid limit'}), 400
+    try:
+        offset = int(request.args.get('offset', '0'))
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        return jsonify({'error': 'Invalid offset'}), 400
+
+    memos = search_memos(g.device_id, q, limit + 1, offset)
+    next_offset = None
+    if len(memos) > limit:
+        memos = memos[:limit]
+        next_offset = offset + limit
+
+    response = json_response({
+        'memos': project(memos, columns),
+        'next_offset': next_offset
+    })
+    response.set_etag(etag)
+    return response
 
 @main_bp.route('/api/memos', methods=['POST'])
 def create_memo():
-    data = request.json
-    memo = Memo(
-        content=data['content'],
-        date=_parse_date(data.get('date'))
-    )
+    memo = _new_memo(request.json)
+    if memo is None:
+        return jsonify({'error': 'Invalid input'}), 400
     db.session.add(memo)
     db.session.commit()
     return jsonify(memo.to_dict()), 201
 
 @main_bp.route('/api/memos/<int:memo_id>', methods=['PUT'])
 def update_memo(memo_id):
-    memo = Memo.query.get_or_404(memo_id)
-    data = request.json
-    memo.content = data.get('content', memo.content)
-    memo.date = _parse_date(data.get('date')) or memo.date
+    memo = _memos().filter_by(id=memo_id).first_or_404()
+    if not _update_memo(memo, request.json):
+        return jsonify({'error': 'Invalid input'}), 400
     db.session.commit()
     return jsonify(memo.to_dict())
 
+@main_bp.route('/api/memos/batch', methods=['POST'])
+def batch_memos():
+    return _apply_batch(Memo, _new_memo, _update_memo)
+
 @main_bp.route('/api/memos/<int:memo_id>', methods=['DELETE'])
 def delete_memo(memo_id):
-    memo = Memo.query.get_or_404(memo_id)
+    memo = _memos().filter_by(id=memo_id).first_or_404()
     db.session.delete(memo)
     db.session.commit()
     return '', 204
@@ -127,78 +359,226 @@ def delete_memo(memo_id):
 # 4. Weather API
 # ----------------------------
 
+# Location: ?lat=&lon=, else the device settings (/api/device), else the
+# configured default. Results are cached per WEATHER_GRID_DEG cell.
 @main_bp.route('/api/weather', methods=['GET'])
 def get_weather():
+    cell = _weather_cell()
+    if cell is None:
+        return jsonify({'error': 'Invalid lat/lon'}), 400
+    return jsonify(_get_weather(cell))
+
+@main_bp.route('/api/weather/stats', methods=['GET'])
+def get_weather_stats():
+    return jsonify(weather_cache.stats())
+
+# ----------------------------
+# 5. Sync API
+# ----------------------------
+# Rows changed since a revision, plus tombstones for deleted ids.
+# Clients keep the returned revision and pass it back as `since`;
+# has_more means the limit was hit and the next page should be requested.
+# reset means `since` can no longer be served incrementally (the log was
+# compacted past it, or it is ahead of this database): the response then holds
+# every row, and the client should replace its copy.
+@main_bp.route('/api/changes', methods=['GET'])
+def get_changes():
     try:
-        # Get Weather Information : Open Meteo API | Asia/Seoul
-        weather_response = requests.get("https://api.open-meteo.com/v1/forecast", params={
-            "latitude": 37.5665,
-            "longitude": 126.9780,
-            "current": "temperature_2m,weather_code",
-            "timezone": "Asia/Seoul"
-        }, timeout=10)
-        weather_response.raise_for_status()
-        weather_data = weather_response.json().get("current", {})
-        
-        # Convert weather_code to integer
-        weather_code = weather_data.get('weather_code', 0)
-        try:
-            weather_code = int(weather_code)
-        except Exception:
-            weather_code = 0
-        
-        def get_weather_description(code):
-            weather_codes = {
-                0: "Clear", 1: "Mostly Clear", 2: "Partly Cloudy", 3: "Cloudy",
-                45: "Fog", 48: "Freezing Fog",
-                51: "Light Drizzle", 53: "Drizzle", 55: "Heavy Drizzle",
-                61: "Light Rain", 63: "Rain", 65: "Heavy Rain",
-                71: "Light Snow", 73: "Snow", 75: "Heavy Snow",
-                80: "Rain Showers", 81: "Heavy Showers", 95: "Thunderstorm"
-            }
-            return weather_codes.get(code, f"Unknown ({code})")
-        
-        # Air Quality Information
-        try:
-            air_response = requests.get("https://air-quality-api.open-meteo.com/v1/air-quality", params={
-                "latitude": 37.5665,
-                "longitude": 126.9780,
-                "current": "pm2_5,pm10"
-            }, timeout=10)
-            dust_info = "Unavailable"
-            if air_response.status_code == 200:
-                air_data = air_response.json().get("current", {})
-                pm2_5 = air_data.get("pm2_5")
-                # print("air_data: ", air_data)  // Debugging line
-                if pm2_5 is not None:
-                    if pm2_5 <= 15:
-                        dust_info = f"Good ({int(pm2_5)})"
-                    elif pm2_5 <= 35:
-                        dust_info = f"Moderate ({int(pm2_5)})"
-                    elif pm2_5 <= 75:
-                        dust_info = f"Poor ({int(pm2_5)})"
-                    else:
-                        dust_info = f"Very Poor ({int(pm2_5)})"
-        except Exception as e:
-            print("air-quality API error:", e)
-            dust_info = "Unavailable"
-        
-        temperature = weather_data.get('temperature_2m')
-        
-        return jsonify({
-            "temperature": f"{temperature}°C" if temperature is not None else "N/A",
-            "weather": get_weather_description(weather_code),
-            "dust": dust_info
-        })
-        
-    except Exception as e:
-        print(f"Weather API error: {e}")
-        return jsonify({
-            "temperature": "N/A",
-            "weather": "Error occurred",
-            "dust": "N/A"
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'Invalid since'}), 400
+    if since < 0:
+        return jsonify({'error': 'Invalid since'}), 400
+    limit = _parse_limit(request.args.get('limit', '1000'), maximum=5000)
+    if limit is None:
+        return jsonify({'error': 'Invalid limit'}), 400
+
+    latest = db.session.query(func.max(ChangeLog.id)).filter(ChangeLog.device_id == g.device_id).scalar() or 0
+    horizon = db.session.get(ChangeLogHorizon, g.device_id)
+    if since > latest or (horizon is not None and since < horizon.pruned_through):
+        return json_response({
+            'revision': latest,
+            'has_more': False,
+            'reset': True,
+            'alarms': fetch_dicts(_alarms().order_by(Alarm.id), ALARM_COLUMNS),
+            'memos': fetch_dicts(_memos().order_by(Memo.id), MEMO_COLUMNS),
+            'deleted': {'alarms': [], 'memos': []}
         })
 
+    entries = (ChangeLog.query
+               .filter(ChangeLog.device_id == g.device_id, ChangeLog.id > since)
+               .order_by(ChangeLog.id)
+               .limit(limit)
+               .all())
+
+    # Keep only the last operation per row
+    last_ops = {}
+    for entry in entries:
+        last_ops[(entry.table_name, entry.row_id)] = entry.op
+
+    result = {}
+    for table, model, columns in (('alarm', Alarm, ALARM_COLUMNS), ('memo', Memo, MEMO_COLUMNS)):
+        upserted = [row_id for (name, row_id), op in last_ops.items() if name == table and op == 'upsert']
+        deleted = [row_id for (name, row_id), op in last_ops.items() if name == table and op == 'delete']
+        rows = fetch_dicts(model.query.filter(model.device_id == g.device_id, model.id.in_(upserted)), columns) if upserted else []
+        # A row missing here was deleted by a change beyond this page
+        found = {row['id'] for row in rows}
+        deleted.extend(row_id for row_id in upserted if row_id not in found)
+        result[table] = (rows, sorted(deleted))
+
+    return json_response({
+        'revision': entries[-1].id if entries else latest,
+        'has_more': len(entries) == limit,
+        'reset': False,
+        'alarms': result['alarm'][0],
+        'memos': result['memo'][0],
+        'deleted': {
+            'alarms': result['alarm'][1],
+            'memos': result['memo'][1]
+        }
+    })
+
+
+# Long-poll change notification: blocks until an alarm or memo is written
+# after revision `since` (or `timeout` seconds pass), then returns the current
+# revisions. Without `since` it answers immediately, to get a starting point.
+LONG_POLL_MAX_TIMEOUT = 55
+
+@main_bp.route('/api/wait', methods=['GET'])
+def wait_for_changes():
+    try:
+        timeout = float(request.args.get('timeout', 25))
+        since = int(request.args['since']) if 'since' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'Invalid since or timeout'}), 400
+    if not math.isfinite(timeout):
+        return jsonify({'error': 'Invalid since or timeout'}), 400
+    timeout = min(timeout, LONG_POLL_MAX_TIMEOUT)
+
+    if since is None or timeout <= 0:
+        revision = revisions.current(g.device_id)
+    else:
+        revision = revisions.wait(g.device_id, since, timeout)
+    return jsonify({
+        'revision': revision,
+        'changed': since is not None and revision != since,
+        'tables': {table: revisions.get(g.device_id, table) for table in TRACKED_TABLES}
+    })
+
+
+# ----------------------------
+# 6. Dashboard API
+# ----------------------------
+# Everything the Pi clock screen renders, in one response:
+# weather, latest regular memo, today's latest memo, dated memos from `date` on
+# (joined per day), regular alarms for `weekday` and the upcoming temporary alarms
+# (`temp_alarm` is the next one).
+DASHBOARD_TEMP_ALARMS = 10
+
+@main_bp.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    date = _parse_date(request.args.get('date')) if 'date' in request.args else datetime.now().date()
+    if date is None:
+        return jsonify({'error': 'Invalid date'}), 400
+    weekday = request.args.get('weekday', str(date.weekday()))  # Monday=0
+    if weekday not in [str(d) for d in range(7)]:
+        return jsonify({'error': 'Invalid weekday'}), 400
+
+    cell = _weather_cell()
+    if cell is None:
+        return jsonify({'error': 'Invalid lat/lon'}), 400
+    weather = _get_weather(cell)
+
+    regular_memo = (_memos()
+                    .filter(Memo.date.is_(None))
+                    .order_by(Memo.created_at.desc(), Memo.id.desc())
+                    .first())
+
+    date_memos = {}
+    today_memo = None
+    for memo in (_memos()
+                 .filter(Memo.date >= date)
+                 .order_by(Memo.date, Memo.created_at, Memo.id)):
+        key = memo.date.strftime('%Y-%m-%d')
+        date_memos.setdefault(key, []).append(memo.content)
+        if memo.date == date:
+            today_memo = memo.content  # the newest one wins
+
+    regular_alarms = (_alarms()
+                      .filter(Alarm.specific_date.is_(None), Alarm.is_active.is_(True))
+                      .filter(_on_weekday(weekday))
+                      .order_by(Alarm.id)
+                      .all())
+    temp_alarms = _upcoming_alarms('temp', DASHBOARD_TEMP_ALARMS)
+
+    return jsonify({
+        'date': date.strftime('%Y-%m-%d'),
+        'weekday': int(weekday),
+        'revision': revisions.current(g.device_id),
+        'weather': weather,
+        'regular_memo': regular_memo.content if regular_memo else "",
+        'today_memo': today_memo or "",
+        'date_memos': {day: ' | '.join(contents) for day, contents in date_memos.items()},
+        'regular_alarms': [[alarm.time, alarm.label] for alarm in regular_alarms],
+        'temp_alarm': temp_alarms[0].to_dict() if temp_alarms else None,
+        'temp_alarms': [[alarm.time, alarm.label, alarm.specific_date.strftime('%Y-%m-%d')]
+                        for alarm in temp_alarms]
+    })
+
+
+# ----------------------------
+# 7. Device Settings
+# ----------------------------
+# Location used for the weather of this device: {"latitude": .., "longitude": ..}
+# (both null to fall back to the server default)
+@main_bp.route('/api/device', methods=['GET'])
+def get_device_settings():
+    settings = db.session.get(DeviceSettings, g.device_id) or DeviceSettings(device_id=g.device_id)
+    return jsonify(settings.to_dict())
+
+@main_bp.route('/api/device', methods=['PUT'])
+def update_device_settings():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid input'}), 400
+    latitude = data.get('latitude')
+    longitude = data.get('longitude')
+    if (latitude is None) != (longitude is None):
+        return jsonify({'error': 'latitude and longitude go together'}), 400
+    if latitude is not None:
+        latitude = _parse_coordinate(latitude, 90)
+        longitude = _parse_coordinate(longitude, 180)
+        if latitude is None or longitude is None:
+            return jsonify({'error': 'Invalid latitude/longitude'}), 400
+
+    settings = db.session.get(DeviceSettings, g.device_id)
+    if settings is None:
+        settings = DeviceSettings(device_id=g.device_id)
+        db.session.add(settings)
+    settings.latitude = latitude
+    settings.longitude = longitude
+    db.session.commit()
+    return jsonify(settings.to_dict())
+
+
+# ----------------------------
+# 8. Metrics
+# ----------------------------
+# Prometheus text format: request latency / SQL / Open-Meteo timings
+# (see app/metrics.py) and the weather cache counters
+@main_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    stats = weather_cache.stats()
+    cache_events = ('hits', 'misses', 'coalesced', 'stale', 'refreshes', 'batches', 'errors')
+    body = metrics.render(extra=[
+        ('weather_cache_events_total', 'counter', 'Weather cache lookups and refreshes by outcome',
+         {(event,): stats[event] for event in cache_events}, ('event',)),
+        ('weather_cache_entries', 'gauge', 'Cached weather locations',
+         {(): stats['entries']}, ()),
+    ])
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
 # ----------------------------
 # 내부 유틸
 # ----------------------------
@@ -208,4 +588,229 @@ def _parse_date(date_str):
             return datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
             return None
-    return None
\ No newline at end of file
+    return None
+
+def _weather_cell():
+    # None if the request carries invalid coordinates
+    config = current_app.config
+    if 'lat' in request.args or 'lon' in request.args:
+        latitude = _parse_coordinate(request.args.get('lat'), 90)
+        longitude = _parse_coordinate(request.args.get('lon'), 180)
+        if latitude is None or longitude is None:
+            return None
+    else:
+        settings = db.session.get(DeviceSettings, g.device_id)
+        if settings is not None and settings.latitude is not None:
+            latitude, longitude = settings.latitude, settings.longitude
+        else:
+            latitude, longitude = config['WEATHER_LATITUDE'], config['WEATHER_LONGITUDE']
+    return grid_cell(latitude, longitude, config['WEATHER_GRID_DEG'])
+
+def _get_weather(cell):
+    try:
+        return weather_cache.get(cell)
+    except Exception as e:
+        print(f"Weather API error: {e}")
+        return {
+            "temperature": "N/A",
+            "weather": "Error occurred",
+            "dust": "N/A"
+        }
+
+def _parse_coordinate(value, limit):
+    # Degrees within [-limit, limit]; NaN fails the range check
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if -limit <= value <= limit else None
+
+def _alarms():
+    return Alarm.query.filter(Alarm.device_id == g.device_id)
+
+def _memos():
+    return Memo.query.filter(Memo.device_id == g.device_id)
+
+def _on_weekday(weekday):
+    # days is a CSV string such as "0,1,2"
+    return (',' + func.replace(Alarm.days, ' ', '') + ',').like(f'%,{weekday},%')
+
+def _upcoming_alarms(kind, limit):
+    now = datetime.now()
+    # Roll forward alarms whose fire time has passed without a /fired report
+    stale = _alarms().filter(Alarm.next_fire_at <= now).all()
+    if stale:
+        for alarm in stale:
+            alarm.refresh_next_fire(now)
+        db.session.commit()
+
+    query = _alarms().filter(Alarm.next_fire_at.isnot(None))
+    if kind == 'regular':
+        query = query.filter(Alarm.specific_date.is_(None))
+    elif kind == 'temp':
+        query = query.filter(Alarm.specific_date.isnot(None))
+    return query.order_by(Alarm.next_fire_at, Alarm.id).limit(limit).all()
+
+def _commit_alarms():
+    # False (and rolled back) if the commit hits the unique (device, time, specific_date) index
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def _new_alarm(data):
+    if not isinstance(data, dict) or not data.get('time'):
+        return None
+    alarm = Alarm(
+        device_id=g.device_id,
+        time=data['time'],
+        label=data.get('label'),
+        days=data.get('days'),
+        specific_date=_parse_date(data.get('specific_date')),
+        is_active=True
+    )
+    alarm.refresh_next_fire()
+    return alarm
+
+def _update_alarm(alarm, data):
+    # False (and nothing changed) if data clears the required time
+    if 'time' in data and not data['time']:
+        return False
+    alarm.time = data.get('time', alarm.time)
+    alarm.label = data.get('label', alarm.label)
+    alarm.days = data.get('days', alarm.days)
+    alarm.specific_date = _parse_date(data.get('specific_date')) or alarm.specific_date
+    alarm.is_active = data.get('is_active', alarm.is_active)
+    alarm.refresh_next_fire()
+    return True
+
+def _new_memo(data):
+    if not isinstance(data, dict) or not data.get('content'):
+        return None
+    return Memo(
+        device_id=g.device_id,
+        content=data['content'],
+        date=_parse_date(data.get('date'))
+    )
+
+def _update_memo(memo, data):
+    # False (and nothing changed) if data clears the required content
+    if 'content' in data and not data['content']:
+        return False
+    memo.content = data.get('content', memo.content)
+    memo.date = _parse_date(data.get('date')) or memo.date
+    return True
+
+BATCH_MAX_OPERATIONS = 1000
+
+def _apply_batch(model, build, update, conflict=None):
+    # Body: [{"op": "create", "data": {...}}, {"op": "update", "id": 1, "data": {...}},
+    #        {"op": "delete", "id": 2}, ...] (or the same list under "operations").
+    # Valid items are applied in request order in a single transaction and commit;
+    # invalid items are reported in their result and skipped.
+    # conflict: 409 error when the batch hits a unique index (None: not expected)
+    body = request.get_json(silent=True)
+    operations = body.get('operations') if isinstance(body, dict) else body
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'Invalid input'}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({'error': f'At most {BATCH_MAX_OPERATIONS} operations per batch'}), 413
+
+    # One IN query for every row referenced by an update or delete
+    ids = {op.get('id') for op in operations
+           if isinstance(op, dict) and op.get('op') in ('update', 'delete') and isinstance(op.get('id'), int)}
+    rows = {row.id: row for row in model.query.filter(model.device_id == g.device_id, model.id.in_(ids))} if ids else {}
+
+    results = []
+    created = []
+    updated = []
+    try:
+        for index, op in enumerate(operations):
+            kind = op.get('op') if isinstance(op, dict) else None
+            data = op.get('data') if isinstance(op, dict) else None
+            if kind == 'create':
+                row = build(data)
+                if row is None:
+                    results.append({'status': 400, 'error': 'Invalid input'})
+                else:
+                    db.session.add(row)
+                    created.append((index, row))
+                    results.append(None)
+            elif kind in ('update', 'delete'):
+                row = rows.get(op.get('id'))
+                if row is None:
+                    results.append({'status': 404, 'error': 'Not found'})
+                elif kind == 'update':
+                    if not isinstance(data, dict) or not update(row, data):
+                        results.append({'status': 400, 'error': 'Invalid input'})
+                        continue
+                    updated.append((index, row))
+                    results.append(None)
+                else:
+                    # The unit of work runs INSERTs before DELETEs: flushing here
+                    # frees the row's unique slot for later items (delete + create
+                    # of the same alarm time replaces it)
+                    db.session.delete(row)
+                    db.session.flush()
+                    del rows[row.id]
+                    results.append({'status': 204, 'id': row.id})
+            else:
+                results.append({'status': 400, 'error': 'Unknown op'})
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        if conflict is None:
+            raise
+        return jsonify({'error': conflict}), 409
+
+    for index, row in created:
+        results[index] = {'status': 201, 'item': row.to_dict()}
+    for index, row in updated:
+        results[index] = {'status': 200, 'item': row.to_dict()}
+    return jsonify({'results': results})
+
+def _encode_cursor(created_at, memo_id):
+    raw = f"{created_at}|{memo_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, memo_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(memo_id)
+    except ValueError:
+        return None
+
+def _fields(columns):
+    # (columns selected by ?fields=, None) or (None, 400 response)
+    try:
+        return select_fields(columns, request.args.get('fields')), None
+    except ValueError as e:
+        return None, (jsonify({'error': f'Unknown fields: {e}'}), 400)
+
+def _not_modified(etag):
+    # 304 for a client whose cached copy is still current (If-None-Match)
+    response = make_response('', 304)
+    response.set_etag(etag)
+    return response
+
+def _parse_bool(value):
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    return None
+
+def _parse_limit(value, maximum=1000):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return None
+    if limit < 1:
+        return None
+    return min(limit, maximum)
@@ -0,0 +1,83 @@
+import re
+from sqlalchemy import text
+from app import db
+
+# Full-text memo search on an FTS5 index kept in sync with the memo table by
+# triggers (external content table: the text itself is stored only once).
+# Without FTS5 in the SQLite build, search falls back to an unranked LIKE scan.
+fts_available = False
+
+FTS_SETUP = [
+    "CREATE VIRTUAL TABLE memo_fts USING fts5(content, content='memo', content_rowid='id', tokenize='unicode61')",
+    """CREATE TRIGGER IF NOT EXISTS memo_fts_ai AFTER INSERT ON memo BEGIN
+        INSERT INTO memo_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS memo_fts_ad AFTER DELETE ON memo BEGIN
+        INSERT INTO memo_fts(memo_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS memo_fts_au AFTER UPDATE OF content ON memo BEGIN
+        INSERT INTO memo_fts(memo_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO memo_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    # Index the memos written before the FTS table existed
+    "INSERT INTO memo_fts(memo_fts) VALUES ('rebuild')",
+]
+
+SEARCH_SQL = text("""
+    SELECT memo.id, memo.content, memo.date, strftime('%Y-%m-%d %H:%M:%S', memo.created_at),
+           snippet(memo_fts, 0, '[', ']', '…', 12)
+    FROM memo_fts JOIN memo ON memo.id = memo_fts.rowid
+    WHERE memo_fts MATCH :query AND memo.device_id = :device_id
+    ORDER BY rank, memo.id
+    LIMIT :limit OFFSET :offset
+""")
+
+FALLBACK_SQL = text("""
+    SELECT id, content, date, strftime('%Y-%m-%d %H:%M:%S', created_at), content
+    FROM memo
+    WHERE device_id = :device_id AND content LIKE :pattern ESCAPE '\\'
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def init_app(app):
+    # Must run inside an app context, after the memo table exists
+    global fts_available
+    try:
+        with db.engine.begin() as conn:
+            exists = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memo_fts'"
+            ).first()
+            if not exists:
+                for statement in FTS_SETUP:
+                    conn.exec_driver_sql(statement)
+        fts_available = True
+    except Exception as e:
+        print(f"[Search] FTS5 unavailable, using LIKE search: {e}")
+        fts_available = False
+
+
+def to_match_query(q):
+    # Every word must match as a prefix; quoting keeps FTS5 operators in user
+    # input (AND, NEAR, *, quotes, ...) from being parsed as syntax
+    words = re.findall(r'\w+', q)
+    return ' '.join('"' + word + '"*' for word in words)
+
+
+def search_memos(device_id, q, limit, offset):
+    if fts_available:
+        query = to_match_query(q)
+        if not query:
+            return []
+        rows = db.session.execute(SEARCH_SQL, {'query': query, 'device_id': device_id, 'limit': limit, 'offset': offset})
+    else:
+        pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        rows = db.session.execute(FALLBACK_SQL, {'pattern': pattern, 'device_id': device_id, 'limit': limit, 'offset': offset})
+    return [{
+        'id': row[0],
+        'content': row[1],
+        'date': row[2],
+        'created_at': row[3],
+        'snippet': row[4]
+    } for row in rows]
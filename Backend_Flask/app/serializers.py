@@ -0,0 +1,61 @@
+from flask import current_app, jsonify
+from sqlalchemy import String, func, type_coerce
+from app.models.alarm import Alarm, Memo
+
+# orjson is optional: used when installed, otherwise Flask's encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ORM-free serialization for list routes: select only the output columns as
+# tuples and let SQLite do the formatting, instead of hydrating model objects
+# and calling to_dict() (one strftime per row) for every row.
+# Dates are stored as 'YYYY-MM-DD' text, so they are read back verbatim.
+ALARM_COLUMNS = {
+    'id': Alarm.id,
+    'time': Alarm.time,
+    'label': Alarm.label,
+    'days': Alarm.days,
+    'specific_date': type_coerce(Alarm.specific_date, String),
+    'is_active': Alarm.is_active,
+    'next_fire_at': func.strftime('%Y-%m-%d %H:%M:%S', Alarm.next_fire_at),
+}
+
+MEMO_COLUMNS = {
+    'id': Memo.id,
+    'content': Memo.content,
+    'date': type_coerce(Memo.date, String),
+    'created_at': func.strftime('%Y-%m-%d %H:%M:%S', Memo.created_at),
+}
+
+
+def select_fields(columns, fields):
+    # fields: the comma-separated ?fields= value, or None for every column.
+    # 'id' is always kept, so that rows can still be updated or deleted.
+    # Raises ValueError listing the unknown names.
+    if fields is None:
+        return columns
+    names = {name.strip() for name in fields.split(',') if name.strip()}
+    unknown = sorted(names - set(columns))
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    return {name: column for name, column in columns.items() if name == 'id' or name in names}
+
+
+def project(rows, columns):
+    # select_fields() for rows that are already dicts (e.g. to_dict() output)
+    return [{name: row[name] for name in columns if name in row} for row in rows]
+
+
+def fetch_dicts(query, columns):
+    # Same keys and values as Model.to_dict() for the given column mapping
+    names = list(columns)
+    rows = query.with_entities(*columns.values()).all()
+    return [dict(zip(names, row)) for row in rows]
+
+
+def json_response(payload):
+    if orjson is None:
+        return jsonify(payload)
+    return current_app.response_class(orjson.dumps(payload), mimetype='application/json')
@@ -1,3 +1,8 @@
+// Device whose alarms and memos this page manages (open the page with ?device=<id>)
+const DEVICE_HEADERS = {
+    'X-Device-ID': new URLSearchParams(window.location.search).get('device') || 'default'
+};
+
 document.addEventListener('DOMContentLoaded', function () {
     // Initial data loading
     loadAlarms();
@@ -11,7 +16,7 @@ document.addEventListener('DOMContentLoaded', function () {
 // Alarm-related functions
 async function loadAlarms() {
     try {
-        const response = await fetch('/api/alarms');
+        const response = await fetch('/api/alarms', { headers: DEVICE_HEADERS });
         const alarms = await response.json();
         displayAlarms(alarms);
     } catch (error) {
@@ -65,6 +70,7 @@ async function handleAlarmSubmit(event) {
         const response = await fetch('/api/alarms', {
             method: 'POST',
             headers: {
+                ...DEVICE_HEADERS,
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
@@ -92,7 +98,8 @@ async function deleteAlarm(id) {
 
     try {
         const response = await fetch(`/api/alarms/${id}`, {
-            method: 'DELETE'
+            method: 'DELETE',
+            headers: DEVICE_HEADERS
         });
 
         if (response.ok) {
@@ -111,6 +118,7 @@ async function toggleAlarm(id, isActive) {
         const response = await fetch(`/api/alarms/${id}`, {
             method: 'PUT',
             headers: {
+                ...DEVICE_HEADERS,
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
@@ -132,7 +140,7 @@ async function toggleAlarm(id, isActive) {
 // Memo-related functions
 async function loadMemos() {
     try {
-        const response = await fetch('/api/memos');
+        const response = await fetch('/api/memos', { headers: DEVICE_HEADERS });
         const memos = await response.json();
         displayMemos(memos);
     } catch (error) {
@@ -172,6 +180,7 @@ async function handleMemoSubmit(event) {
         const response = await fetch('/api/memos', {
             method: 'POST',
             headers: {
+                ...DEVICE_HEADERS,
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
@@ -197,7 +206,8 @@ async function deleteMemo(id) {
 
     try {
         const response = await fetch(`/api/memos/${id}`, {
-            method: 'DELETE'
+            method: 'DELETE',
+            headers: DEVICE_HEADERS
         });
 
         if (response.ok) {
@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from app.metrics import metrics
+
+
+def get_weather_description(code):
+    weather_codes = {
+        0: "Clear", 1: "Mostly Clear", 2: "Partly Cloudy", 3: "Cloudy",
+        45: "Fog", 48: "Freezing Fog",
+        51: "Light Drizzle", 53: "Drizzle", 55: "Heavy Drizzle",
+        61: "Light Rain", 63: "Rain", 65: "Heavy Rain",
+        71: "Light Snow", 73: "Snow", 75: "Heavy Snow",
+        80: "Rain Showers", 81: "Heavy Showers", 95: "Thunderstorm"
+    }
+    return weather_codes.get(code, f"Unknown ({code})")
+
+
+# Open-Meteo client: forecast and air quality are fetched concurrently over a
+# pooled keep-alive session, under one deadline for the whole lookup.
+# One call covers several locations (Open-Meteo takes comma-separated
+# coordinate lists), so refreshing many grid cells costs two requests.
+class OpenMeteoClient:
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+    AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+
+    def __init__(self, deadline=10):
+        self.deadline = deadline
+        self.forecast_url = self.FORECAST_URL
+        self.air_quality_url = self.AIR_QUALITY_URL
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="open-meteo")
+
+    def init_app(self, app):
+        app.config.setdefault('WEATHER_UPSTREAM_DEADLINE', float(os.environ.get('WEATHER_UPSTREAM_DEADLINE', 10)))
+        # The URLs can point at a local stand-in (benchmarks/fleet_load.py)
+        app.config.setdefault('OPEN_METEO_FORECAST_URL', os.environ.get('OPEN_METEO_FORECAST_URL', self.FORECAST_URL))
+        app.config.setdefault('OPEN_METEO_AIR_QUALITY_URL', os.environ.get('OPEN_METEO_AIR_QUALITY_URL', self.AIR_QUALITY_URL))
+        self.deadline = app.config['WEATHER_UPSTREAM_DEADLINE']
+        self.forecast_url = app.config['OPEN_METEO_FORECAST_URL']
+        self.air_quality_url = app.config['OPEN_METEO_AIR_QUALITY_URL']
+
+    def _get_current(self, upstream, url, params, count, timeout):
+        # upstream: metrics label ('forecast' / 'air_quality')
+        # Returns the "current" block of each of the `count` locations, in order
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            data = response.json()
+            # A single location comes back as an object, several as a list
+            results = data if isinstance(data, list) else [data]
+            if len(results) != count:
+                raise ValueError(f"expected {count} locations, got {len(results)}")
+            current = [result.get("current", {}) for result in results]
+        except Exception as e:
+            metrics.observe_upstream(upstream, time.perf_counter() - start, e)
+            raise
+        metrics.observe_upstream(upstream, time.perf_counter() - start)
+        return current
+
+    def fetch(self, cells):
+        # cells: [(latitude, longitude), ...] -> {cell: weather}
+        # Raises if the forecast misses the deadline; air quality is best effort.
+        deadline = time.monotonic() + self.deadline
+        latitudes = ",".join(str(lat) for lat, _ in cells)
+        longitudes = ",".join(str(lon) for _, lon in cells)
+        weather_future = self.executor.submit(self._get_current, "forecast", self.forecast_url, {
+            "latitude": latitudes,
+            "longitude": longitudes,
+            "current": "temperature_2m,weather_code",
+            "timezone": "auto"
+        }, len(cells), self.deadline)
+        air_future = self.executor.submit(self._get_current, "air_quality", self.air_quality_url, {
+            "latitude": latitudes,
+            "longitude": longitudes,
+            "current": "pm2_5,pm10"
+        }, len(cells), self.deadline)
+
+        weather_data = weather_future.result(timeout=max(0, deadline - time.monotonic()))
+
+        # Air Quality Information
+        try:
+            air_data = air_future.result(timeout=max(0, deadline - time.monotonic()))
+        except Exception as e:
+            print("air-quality API error:", repr(e))
+            air_data = [{}] * len(cells)
+
+        return {cell: _describe(weather, air) for cell, weather, air in zip(cells, weather_data, air_data)}
+
+
+def _describe(weather_data, air_data):
+    # Convert weather_code to integer
+    weather_code = weather_data.get('weather_code', 0)
+    try:
+        weather_code = int(weather_code)
+    except Exception:
+        weather_code = 0
+
+    temperature = weather_data.get('temperature_2m')
+
+    return {
+        "temperature": f"{temperature}°C" if temperature is not None else "N/A",
+        "weather": get_weather_description(weather_code),
+        "dust": _describe_dust(air_data.get("pm2_5"))
+    }
+
+
+def grid_cell(latitude, longitude, grid):
+    # Devices within the same `grid`-degree cell share one cached result,
+    # fetched for the center of the cell
+    return (round(round(latitude / grid) * grid, 4), round(round(longitude / grid) * grid, 4))
+
+
+def _describe_dust(pm2_5):
+    if pm2_5 is None:
+        return "Unavailable"
+    if pm2_5 <= 15:
+        return f"Good ({int(pm2_5)})"
+    elif pm2_5 <= 35:
+        return f"Moderate ({int(pm2_5)})"
+    elif pm2_5 <= 75:
+        return f"Poor ({int(pm2_5)})"
+    return f"Very Poor ({int(pm2_5)})"
+
+
+# In-process TTL cache in front of the Open-Meteo upstream, keyed by grid cell
+# - A fresh entry is returned directly (hit).
+# - An expired entry is returned as-is and queued for a background refresh
+#   (stale-while-revalidate). Cells queued within `batch_window` seconds are
+#   refreshed together, in one upstream call per `max_batch` cells.
+# - With no entry at all, the first caller fetches (taking the queued stale
+#   cells along) and concurrent callers wait for that same fetch instead of
+#   calling upstream themselves (single-flight).
+# Cells come from client coordinates, so the cache is bounded: at most
+# `max_entries` cells are kept (least recently used ones are evicted first), and
+# a cell not refreshed for `max_age_ttls` TTLs is dropped instead of served.
+# loader(keys) returns {key: value} for every key, or raises.
+class WeatherCache:
+    def __init__(self, loader, ttl=300, wait_timeout=30, batch_window=0.05, max_batch=50,
+                 max_entries=1000, max_age_ttls=3):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_age_ttls = max_age_ttls
+        self.wait_timeout = wait_timeout
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, fetched_at), least recently used first
+        self._inflight = {}  # key -> threading.Event set when the fetch ends
+        self._queued = []    # stale keys waiting for the next batched refresh
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+        self.refreshes = 0
+        self.batches = 0
+        self.errors = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        app.config.setdefault('WEATHER_CACHE_TTL', int(os.environ.get('WEATHER_CACHE_TTL', 300)))
+        app.config.setdefault('WEATHER_BATCH_WINDOW', float(os.environ.get('WEATHER_BATCH_WINDOW', 0.05)))
+        app.config.setdefault('WEATHER_CACHE_MAX_ENTRIES', int(os.environ.get('WEATHER_CACHE_MAX_ENTRIES', 1000)))
+        self.ttl = app.config['WEATHER_CACHE_TTL']
+        self.batch_window = app.config['WEATHER_BATCH_WINDOW']
+        self.max_entries = app.config['WEATHER_CACHE_MAX_ENTRIES']
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] >= self.ttl * self.max_age_ttls:
+                # Too old to serve, even stale
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, fetched_at = entry
+                if time.monotonic() - fetched_at < self.ttl:
+                    self.hits += 1
+                    return value
+                self.stale += 1
+                if key not in self._inflight:
+                    self._inflight[key] = threading.Event()
+                    self._queued.append(key)
+                    if len(self._queued) == 1:
+                        threading.Thread(target=self._refresh_queued, daemon=True).start()
+                return value
+
+            event = self._inflight.get(key)
+            if event is None:
+                self.misses += 1
+                self._inflight[key] = threading.Event()
+                keys = [key] + self._queued[:self.max_batch - 1]
+                del self._queued[:self.max_batch - 1]
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if leader:
+            return self._load(keys, raise_errors=True)[key]
+
+        event.wait(self.wait_timeout)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            raise RuntimeError("Weather upstream unavailable")
+        return entry[0]
+
+    def _refresh_queued(self):
+        time.sleep(self.batch_window)
+        while True:
+            with self._lock:
+                keys = self._queued[:self.max_batch]
+                del self._queued[:self.max_batch]
+            if not keys:
+                return
+            self._load(keys)
+
+    def _load(self, keys, raise_errors=False):
+        try:
+            values = self.loader(keys)
+            with self._lock:
+                now = time.monotonic()
+                for key in keys:
+                    self._entries[key] = (values[key], now)
+                    self._entries.move_to_end(key)
+                self._evict(now)
+                self.refreshes += len(keys)
+                self.batches += 1
+            return values
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            if raise_errors:
+                raise
+            print(f"Weather refresh error: {e}")
+        finally:
+            with self._lock:
+                events = [self._inflight.pop(key) for key in keys]
+            for event in events:
+                event.set()
+
+    def _evict(self, now):
+        # Called with the lock held: drops expired cells, then the least
+        # recently used ones beyond max_entries
+        max_age = self.ttl * self.max_age_ttls
+        for key in [key for key, (_, fetched_at) in self._entries.items() if now - fetched_at >= max_age]:
+            del self._entries[key]
+            self.evictions += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "stale": self.stale,
+                "refreshes": self.refreshes,
+                "batches": self.batches,
+                "errors": self.errors,
+                "evictions": self.evictions
+            }
+
+
+open_meteo = OpenMeteoClient()
+weather_cache = WeatherCache(open_meteo.fetch)
+
+
+def init_app(app):
+    # Location used when neither the request nor the device settings give one,
+    # and the size of a cache cell in degrees (0.1 is about 11 km)
+    app.config.setdefault('WEATHER_LATITUDE', float(os.environ.get('WEATHER_LATITUDE', 37.5665)))
+    app.config.setdefault('WEATHER_LONGITUDE', float(os.environ.get('WEATHER_LONGITUDE', 126.9780)))
+    app.config.setdefault('WEATHER_GRID_DEG', float(os.environ.get('WEATHER_GRID_DEG', 0.1)))
+    open_meteo.init_app(app)
+    weather_cache.init_app(app)
@@ -0,0 +1,362 @@
+# Fleet load test: N simulated Raspberry Pis polling one backend.
+#
+# Usage (from Backend_Flask/):
+#   python benchmarks/fleet_load.py [--devices 50] [--seconds 30] [--speedup 10]
+#                                   [--pattern both] [--alarms 50] [--memos 200] [--cities 5]
+#
+# The backend (create_app() on a temporary database) is served over real HTTP
+# on a local port, with Open-Meteo replaced by a local stand-in
+# (--upstream-latency). Every device gets its own X-Device-ID and its own
+# seeded alarms and memos, sits in one of --cities locations (device settings),
+# and replays the requests its GUI screens make.
+# All screens are built at startup, so all of their timers run at once:
+#
+#   legacy   the original clients, which downloaded whole tables:
+#            ClockScreen     60s  weather, memos x2, alarms x2
+#                            10s  alarms (temporary alarm)
+#            AlarmRingScreen 30s  memos x2
+#            MemoCheckScreen 60s  memos x2, alarms
+#   current  the clients in this tree, which read alarms and memos from a
+#            local replica synced through /api/changes (Services/local_replica.py)
+#            and share one snapshot (Services/api_client.py); only the weather
+#            is downloaded, when the snapshot is older than SNAPSHOT_TTL or
+#            the replica changed:
+#            ClockScreen     60s  snapshot
+#            AlarmRingScreen 300s snapshot
+#            MemoCheckScreen 300s snapshot
+#            ChangeListener  long-poll /api/wait (not part of the latency figures);
+#                            a change syncs the replica, then every screen refreshes
+#
+# Intervals are divided by --speedup, and every device starts at a random
+# phase. One memo per device is edited every --edit-interval (scaled) seconds,
+# as if from the web page. Reported per pattern and endpoint: requests/s,
+# p50/p95/p99 latency, error rate (exceptions and 5xx) and bytes received.
+# With --pattern both each pattern runs in its own process, so the second one
+# does not start with the weather cache, revisions and metrics of the first.
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.alarm import Alarm, Memo
+from app.models.device import DeviceSettings
+
+LONG_POLL_TIMEOUT = 25
+SNAPSHOT_TTL = 10  # as in Services/api_client.py
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# ----------------------------
+# Open-Meteo stand-in
+# ----------------------------
+def start_fake_open_meteo(latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            if self.path.startswith('/air-quality'):
+                current = {'pm2_5': 12.0, 'pm10': 20.0}
+            else:
+                current = {'temperature_2m': 18.5, 'weather_code': 1}
+            # Several comma-separated locations are answered with a list
+            count = len(parse_qs(urlparse(self.path).query).get('latitude', [''])[0].split(','))
+            results = [{'current': current} for _ in range(count)]
+            body = json.dumps(results if count > 1 else results[0]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ----------------------------
+# Seed data
+# ----------------------------
+def seed(app, devices, alarms, memos, cities):
+    today = date.today()
+    with app.app_context():
+        for n, device_id in enumerate(devices):
+            rows = []
+            for i in range(alarms):
+                if i % 5 == 4:
+                    # Every fifth alarm is a temporary one on one of the next days
+                    rows.append(Alarm(device_id=device_id, time=f"{i % 24:02d}:{i % 60:02d}", label=f"temp {i}",
+                                      specific_date=today + timedelta(days=i % 14), is_active=True))
+                else:
+                    rows.append(Alarm(device_id=device_id, time=f"{i % 24:02d}:{i % 60:02d}", label=f"alarm {i}",
+                                      days="0,1,2,3,4" if i % 2 else "5,6", is_active=i % 7 != 0))
+            for alarm in rows:
+                alarm.refresh_next_fire()
+            for i in range(memos):
+                memo_date = today + timedelta(days=i % 30 - 10) if i % 3 else None
+                rows.append(Memo(device_id=device_id, content=f"memo {i} for {device_id}", date=memo_date))
+            # Cities one degree apart, i.e. different weather cells
+            rows.append(DeviceSettings(device_id=device_id, latitude=30.0 + n % cities, longitude=120.0))
+            db.session.add_all(rows)
+            db.session.commit()
+
+
+# ----------------------------
+# Simulated device
+# ----------------------------
+class Device:
+    def __init__(self, device_id, base_url, stats, snapshot_ttl=SNAPSHOT_TTL):
+        self.device_id = device_id
+        self.base_url = base_url
+        self.stats = stats
+        self.session = requests.Session()
+        self.session.headers['X-Device-ID'] = device_id
+        self.edits = 0
+        # Shared snapshot state; revision is the replica's
+        self.snapshot_ttl = snapshot_ttl
+        self.snapshot_at = None
+        self.snapshot_revision = None
+        self.revision = None
+        self.snapshot_lock = threading.Lock()
+
+    def request(self, method, path, name=None, params=None, json_body=None, timeout=30):
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, self.base_url + path, params=params, json=json_body,
+                                            timeout=timeout)
+            status = response.status_code
+            # Bytes on the wire (compressed when the server gzipped the body)
+            size = int(response.headers.get('Content-Length', len(response.content)))
+        except requests.RequestException:
+            status, size = None, 0
+        self.stats.record(name or f"{method} {path}", time.perf_counter() - start, status, size)
+        return response
+
+    # Legacy clients: every helper downloaded the full table
+    def legacy_clock_full(self):
+        self.request('GET', '/api/weather')
+        self.request('GET', '/api/memos')
+        self.request('GET', '/api/memos')
+        self.request('GET', '/api/alarms')
+        self.request('GET', '/api/alarms')
+
+    def legacy_clock_temp(self):
+        self.request('GET', '/api/alarms')
+
+    def legacy_ring_memos(self):
+        self.request('GET', '/api/memos')
+        self.request('GET', '/api/memos')
+
+    def legacy_memo_check(self):
+        self.request('GET', '/api/memos')
+        self.request('GET', '/api/memos')
+        self.request('GET', '/api/alarms')
+
+    # Current clients: a screen refresh reads the shared snapshot; concurrent
+    # refreshes wait for one download
+    def snapshot(self):
+        with self.snapshot_lock:
+            if (self.snapshot_at is not None
+                    and time.monotonic() - self.snapshot_at < self.snapshot_ttl
+                    and (self.revision is None or self.revision == self.snapshot_revision)):
+                return
+            self.request('GET', '/api/weather')
+            self.snapshot_at = time.monotonic()
+            self.snapshot_revision = self.revision
+
+    def sync_replica(self):
+        has_more = True
+        while has_more:
+            response = self.request('GET', '/api/changes', params={'since': self.revision or 0, 'limit': 1000})
+            if response is None or response.status_code != 200:
+                return
+            page = response.json()
+            self.revision, has_more = page['revision'], page['has_more']
+
+    def edit_memo(self):
+        self.edits += 1
+        self.request('POST', '/api/memos', json_body={'content': f"edit {self.edits} on {self.device_id}"})
+
+
+PATTERNS = {
+    # name -> [(interval in seconds, task)]
+    'legacy': [
+        (60, Device.legacy_clock_full),
+        (10, Device.legacy_clock_temp),
+        (30, Device.legacy_ring_memos),
+        (60, Device.legacy_memo_check),
+    ],
+    'current': [
+        (60, Device.snapshot),   # ClockScreen
+        (300, Device.snapshot),  # AlarmRingScreen
+        (300, Device.snapshot),  # MemoCheckScreen
+    ],
+}
+
+
+def run_device(device, timers, stop):
+    # One thread per device, firing its timers in order of due time
+    now = time.monotonic()
+    due = [now + random.uniform(0, interval) for interval, _ in timers]
+    while not stop.is_set():
+        i = min(range(len(timers)), key=due.__getitem__)
+        if stop.wait(max(0, due[i] - time.monotonic())):
+            break
+        timers[i][1](device)
+        due[i] += timers[i][0]
+
+
+# Long-polls on its own session (poller) and, like the GUI, syncs the replica
+# and refreshes every screen of the device when the revision changes
+def run_long_poll(poller, device, timeout, stop):
+    device.sync_replica()  # startup sync (a full copy)
+    revision = None
+    while not stop.is_set():
+        params = {'timeout': timeout}
+        if revision is not None:
+            params['since'] = revision
+        start = time.perf_counter()
+        try:
+            response = poller.session.get(poller.base_url + '/api/wait', params=params, timeout=timeout + 10)
+            status = response.status_code
+            changed = status == 200 and response.json().get('changed')
+            revision = response.json().get('revision', revision) if status == 200 else revision
+        except (requests.RequestException, ValueError):
+            status, changed = None, False
+            stop.wait(1)
+        poller.stats.record('GET /api/wait (long-poll)', time.perf_counter() - start, status, 0)
+        if changed:
+            device.sync_replica()
+            for _ in PATTERNS['current']:
+                device.snapshot()
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.bytes = {}
+
+    def record(self, name, seconds, status, size):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            self.bytes[name] = self.bytes.get(name, 0) + size
+            if status is None or status >= 500:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def run_pattern(pattern, args, upstream_url):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'fleet.db')}",
+            'OPEN_METEO_FORECAST_URL': f"{upstream_url}/v1/forecast",
+            'OPEN_METEO_AIR_QUALITY_URL': f"{upstream_url}/air-quality/v1/air-quality",
+            'COMPACTION_INTERVAL': 0,
+        })
+        device_ids = [f"device-{i:04d}" for i in range(args.devices)]
+        seed(app, device_ids, args.alarms, args.memos, args.cities)
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        stats = Stats()
+        stop = threading.Event()
+        timers = [(interval / args.speedup, task) for interval, task in PATTERNS[pattern]]
+        if args.edit_interval > 0:
+            timers.append((args.edit_interval / args.speedup, Device.edit_memo))
+
+        threads = []
+        for device_id in device_ids:
+            device = Device(device_id, base_url, stats, SNAPSHOT_TTL / args.speedup)
+            threads.append(threading.Thread(target=run_device, args=(device, timers, stop), daemon=True))
+            if pattern == 'current':
+                poller = Device(device_id, base_url, stats)
+                poll_timeout = max(1, LONG_POLL_TIMEOUT / args.speedup)
+                threads.append(threading.Thread(target=run_long_poll, args=(poller, device, poll_timeout, stop), daemon=True))
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join(timeout=LONG_POLL_TIMEOUT / args.speedup + 5)
+
+        server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+    return stats
+
+
+def report(pattern, stats, args):
+    print(f"\n[{pattern}] {args.devices} devices, {args.seconds:g}s at {args.speedup:g}x speed")
+    print(f"{'endpoint':<28} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7} {'kB/s':>9}")
+    total = 0
+    for name in sorted(stats.latencies):
+        latencies = stats.latencies[name]
+        errors = stats.errors.get(name, 0)
+        if 'long-poll' not in name:
+            total += len(latencies)
+        print(f"{name:<28} {len(latencies) / args.seconds:>8.1f} "
+              f"{percentile(latencies, 50) * 1000:>6.1f}ms {percentile(latencies, 95) * 1000:>6.1f}ms "
+              f"{percentile(latencies, 99) * 1000:>6.1f}ms {errors / len(latencies):>6.1%} "
+              f"{stats.bytes.get(name, 0) / 1024 / args.seconds:>9.1f}")
+    print(f"{'total (polling)':<28} {total / args.seconds:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fleet polling load test')
+    parser.add_argument('--devices', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--speedup', type=float, default=10, help='divide every client interval by this factor')
+    parser.add_argument('--pattern', choices=['legacy', 'current', 'both'], default='both')
+    parser.add_argument('--alarms', type=int, default=50, help='alarms seeded per device')
+    parser.add_argument('--memos', type=int, default=200, help='memos seeded per device')
+    parser.add_argument('--cities', type=int, default=5, help='distinct device locations (weather cells)')
+    parser.add_argument('--edit-interval', type=float, default=600,
+                        help='seconds between memo edits per device (0 disables)')
+    parser.add_argument('--upstream-latency', type=float, default=0.1, help='Open-Meteo stand-in latency (s)')
+    args = parser.parse_args()
+
+    if args.pattern == 'both':
+        # The app's caches are process-wide singletons: a fresh process per pattern
+        for pattern in ('legacy', 'current'):
+            subprocess.run([sys.executable, __file__, *sys.argv[1:], '--pattern', pattern], check=True)
+        return
+
+    # Keep werkzeug's per-request log lines out of the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    upstream = start_fake_open_meteo(args.upstream_latency)
+    upstream_url = f"http://127.0.0.1:{upstream.server_port}"
+    stats = run_pattern(args.pattern, args, upstream_url)
+    report(args.pattern, stats, args)
+    upstream.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Serialization benchmark for the list routes: ORM objects + to_dict() + jsonify
+# versus the column-tuple fast path in app/serializers.py.
+#
+# Usage (from Backend_Flask/):
+#   python benchmarks/serialization.py [--sizes 1000 10000 100000] [--repeat 3]
+#
+# Each size is seeded into a fresh database; the best of --repeat runs is reported.
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.alarm import Alarm, Memo
+from app.serializers import ALARM_COLUMNS, MEMO_COLUMNS, fetch_dicts, json_response, orjson
+
+
+def seed(n):
+    now = datetime.utcnow()
+    db.session.execute(insert(Alarm), [{
+        'time': f"{i % 24:02d}:{i % 60:02d}",
+        'label': f"alarm {i}",
+        'days': "0,1,2,3,4" if i % 2 else None,
+        'specific_date': None if i % 2 else date(2030, 1, 1) + timedelta(days=i % 365),
+        'is_active': True,
+        'created_at': now,
+        'next_fire_at': now + timedelta(minutes=i),
+    } for i in range(n)])
+    db.session.execute(insert(Memo), [{
+        'content': f"memo {i} " + "x" * 40,
+        'date': date(2030, 1, 1) + timedelta(days=i % 365) if i % 3 else None,
+        'created_at': now + timedelta(seconds=i),
+    } for i in range(n)])
+    db.session.commit()
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List serialization benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"JSON encoder for the fast path: {'orjson' if orjson else 'Flask (orjson not installed)'}\n")
+    print(f"{'rows':>8} {'table':<6} {'ORM + to_dict':>14} {'fast path':>10} {'speedup':>8}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app({
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                'COMPACTION_INTERVAL': 0,
+            })
+            with app.app_context(), app.test_request_context():
+                seed(n)
+                for table, model, columns in (('alarm', Alarm, ALARM_COLUMNS), ('memo', Memo, MEMO_COLUMNS)):
+                    orm = best_of(args.repeat, lambda: jsonify([row.to_dict() for row in model.query.all()]).get_data())
+                    fast = best_of(args.repeat, lambda: json_response(fetch_dicts(model.query, columns)).get_data())
+                    print(f"{n:>8} {table:<6} {orm * 1000:>12.1f}ms {fast * 1000:>8.1f}ms {orm / fast:>7.1f}x")
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Read/write concurrency benchmark for the SQLite storage profiles.
+#
+# Usage (from Backend_Flask/):
+#   python benchmarks/sqlite_profile.py [--readers 8] [--writers 2] [--seconds 5] [--rows 500]
+#
+# For every profile in app.storage.SQLITE_PROFILES a fresh database is seeded,
+# then reader threads poll GET /api/alarms while writer threads POST memos.
+# Reported per profile: completed reads/writes per second, p95 latency, and
+# failed requests (e.g. "database is locked").
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.alarm import Alarm
+from app.storage import SQLITE_PROFILES
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_profile(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'SQLITE_PROFILE': profile,
+            'COMPACTION_INTERVAL': 0,
+        })
+        with app.app_context():
+            db.session.add_all([
+                Alarm(time=f"{i % 24:02d}:{i % 60:02d}", label=f"alarm {i}", days="0,1,2,3,4", is_active=True)
+                for i in range(args.rows)
+            ])
+            db.session.commit()
+
+        stop = threading.Event()
+        stats = {'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0}
+        lock = threading.Lock()
+
+        def worker(kind):
+            client = app.test_client()
+            latencies = []
+            errors = 0
+            n = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                if kind == 'read':
+                    response = client.get('/api/alarms')
+                else:
+                    n += 1
+                    response = client.post('/api/memos', json={'content': f'bench {n}'})
+                if response.status_code >= 500:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+            with lock:
+                stats[kind].extend(latencies)
+                stats[f'{kind}_errors'] += errors
+
+        threads = [threading.Thread(target=worker, args=('read',)) for _ in range(args.readers)]
+        threads += [threading.Thread(target=worker, args=('write',)) for _ in range(args.writers)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        with app.app_context():
+            db.engine.dispose()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite storage profile benchmark')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=500)
+    args = parser.parse_args()
+
+    # Failed requests are counted below; keep their tracebacks out of the report
+    logging.disable(logging.ERROR)
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s, {args.rows} alarms\n")
+    print(f"{'profile':<12} {'reads/s':>9} {'read p95':>10} {'writes/s':>9} {'write p95':>10} {'errors':>7}")
+    for profile in SQLITE_PROFILES:
+        stats = run_profile(profile, args)
+        print(f"{profile:<12} "
+              f"{len(stats['read']) / args.seconds:>9.1f} {percentile(stats['read'], 95) * 1000:>8.1f}ms "
+              f"{len(stats['write']) / args.seconds:>9.1f} {percentile(stats['write'], 95) * 1000:>8.1f}ms "
+              f"{stats['read_errors'] + stats['write_errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,14 @@ import os
 import threading
 
 from Services.memo_loader import get_regular_memo, get_date_memo
+from Services.api_client import api_client
+from Services.task_pool import task_pool
+from Services.poll_policy import poll_policy
 
 
-def monitor_stretch_motion():
+def monitor_stretch_motion(stop_event):
+    # Runs until a stretch is seen, the camera fails or stop_event is set
+    # (alarm dismissed by key), so the camera is released either way
     try:
         import cv2
         import mediapipe as mp
@@ -22,7 +27,7 @@ def monitor_stretch_motion():
         min_duration = 0.5
 
         with mp_pose.Pose(min_detection_confidence=0.5) as pose:
-            while True:
+            while not stop_event.is_set():
                 ret, frame = cap.read()
                 if not ret:
                     break
@@ -58,8 +63,9 @@ def monitor_stretch_motion():
 
 
 class AlarmRingScreen(QWidget):
-    memo_updated = pyqtSignal()
+    memo_updated = pyqtSignal(object)
     stop_alarm_signal = pyqtSignal()
+    remote_changed = pyqtSignal(int)
 
     def __init__(self, controller):
         super().__init__()
@@ -71,6 +77,7 @@ class AlarmRingScreen(QWidget):
         self.setup_timers()
         self.sound = None
         self.setup_sound()
+        self.motion_stop = threading.Event()
 
         self.stop_alarm_signal.connect(self.stop_alarm)
 
@@ -116,10 +123,16 @@ class AlarmRingScreen(QWidget):
         self.timer.start(1000)
         self.update_time()
 
+        # Memos are refreshed when the local replica synced a change;
+        # the timer is only a fallback (every 5 min, adapted by the poll policy)
         self.memo_timer = QTimer()
+        self.memo_timer.setSingleShot(True)
         self.memo_timer.timeout.connect(self.fetch_memo_async)
-        self.memo_timer.start(30000)
+        self.memo_timer.timeout.connect(self.schedule_refresh)
+        self.schedule_refresh()
         self.memo_updated.connect(self.update_memo)
+        self.remote_changed.connect(lambda revision: self.fetch_memo_async())
+        api_client.replica.subscribe(self.remote_changed.emit)
         self.fetch_memo_async()
 
     def setup_sound(self):
@@ -142,37 +155,39 @@ class AlarmRingScreen(QWidget):
         else:
             print("[Warning] Alarm sound not available")
 
-        threading.Thread(target=self.monitor_stretch_motion_thread, daemon=True).start()
+        # One camera thread per ringing; the previous one is told to stop
+        self.motion_stop.set()
+        self.motion_stop = threading.Event()
+        threading.Thread(target=self.monitor_stretch_motion_thread, args=(self.motion_stop,), daemon=True).start()
 
-    def monitor_stretch_motion_thread(self):
-        if monitor_stretch_motion():
+    def monitor_stretch_motion_thread(self, stop_event):
+        if monitor_stretch_motion(stop_event) and not stop_event.is_set():
             self.stop_alarm_signal.emit()
 
     def update_time(self):
         now = datetime.datetime.now()
         self.time_label.setText(now.strftime("%H:%M:%S"))
 
+    def schedule_refresh(self):
+        self.memo_timer.start(int(poll_policy.interval(300, minimum=60, maximum=3600) * 1000))
+
     def fetch_memo_async(self):
         def run():
             try:
-                regular = get_regular_memo()
-                date = get_date_memo()
-                self.memo_cache["regular"] = regular or "None"
-                self.memo_cache["date"] = date or "None"
-                self.memo_updated.emit()
+                return {"regular": get_regular_memo() or "None", "date": get_date_memo() or "None"}
             except Exception as e:
                 print(f"[Memo Fetch Error] {e}")
-                self.memo_cache["regular"] = "Load failed"
-                self.memo_cache["date"] = "Load failed"
-                self.memo_updated.emit()
-        threading.Thread(target=run, daemon=True).start()
+                return {"regular": "Load failed", "date": "Load failed"}
+        task_pool.submit("alarm_ring_screen", run, self.memo_updated.emit)
 
-    def update_memo(self):
+    def update_memo(self, memo_cache):
+        self.memo_cache = memo_cache
         self.memo_regular_label.setText(f"✓ Regular Memo: {self.memo_cache['regular']}")
         self.date_memo_label.setText(f"🗓 Date Memo: {self.memo_cache['date']}")
 
     def stop_alarm(self):
         print("Alarm stopped!")
+        self.motion_stop.set()
         if self.sound:
             self.sound.stop()
         self.setup_sound()
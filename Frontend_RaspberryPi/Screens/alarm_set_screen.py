@@ -1,10 +1,9 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
 from PyQt6.QtCore import Qt
 import requests
+from Services.api_client import api_client
 import datetime
 
-API_BASE_URL = "http://127.0.0.1:5000"
-
 def get_today_and_next_dates():
     now = datetime.datetime.now()
     today = now.date()
@@ -127,26 +126,24 @@ class AlarmSetScreen(QWidget):
         if "OFF" in current_text:
             self.active_label.setText("🔘 Alarm Active: ON")
             try:
-                requests.post(
-                    f"{API_BASE_URL}/api/alarms/temp",
-                    json={
-                        "time": alarm_time,
-                        "date": today.strftime("%Y-%m-%d")
-                    }
-                )
+                api_client.post("/api/alarms/temp", json={
+                    "time": alarm_time,
+                    "date": today.strftime("%Y-%m-%d")
+                })
             except Exception as e:
                 print(f"[Failed to register alarm] {e}")
         else:
             self.active_label.setText("🔘 Alarm Active: OFF")
             for target_date in [today, next_day]:
                 try:
-                    requests.delete(
-                        f"{API_BASE_URL}/api/alarms/temp",
-                        json={
-                            "time": alarm_time,
-                            "date": target_date.strftime("%Y-%m-%d")
-                        }
-                    )
+                    api_client.delete("/api/alarms/temp", json={
+                        "time": alarm_time,
+                        "date": target_date.strftime("%Y-%m-%d")
+                    })
+                except requests.exceptions.HTTPError as e:
+                    # 404: no alarm at that time on that date
+                    if e.response.status_code != 404:
+                        print(f"[Failed to delete alarm for {target_date}] {e}")
                 except Exception as e:
                     print(f"[Failed to delete alarm for {target_date}] {e}")
         self.update_highlight()
\ No newline at end of file
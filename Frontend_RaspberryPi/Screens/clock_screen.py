@@ -1,13 +1,14 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout
 from PyQt6.QtCore import QTimer, Qt, pyqtSignal
 import datetime
-import threading
-from Services.memo_loader import get_regular_memo, get_date_memos
-from Services.weather_api import get_weather
-from Services.alarm_manager import get_regular_alarms, get_temporary_alarm
+from Services.dashboard import get_dashboard
+from Services.api_client import api_client
+from Services.task_pool import task_pool
+from Services.poll_policy import poll_policy
 
 class ClockScreen(QWidget):
-    data_updated = pyqtSignal()
+    data_updated = pyqtSignal(object)
+    remote_changed = pyqtSignal(int)
 
     def __init__(self, controller):
         super().__init__()
@@ -104,50 +105,37 @@ class ClockScreen(QWidget):
         self.timer.start(1000)
         self.update_time_only()
 
-        # Full data timer (60s)
+        # Full data timer (60s, adapted by the poll policy)
         self.data_timer = QTimer()
+        self.data_timer.setSingleShot(True)
         self.data_timer.timeout.connect(self.fetch_all_async)
-        self.data_timer.start(60000)
+        self.data_timer.timeout.connect(self.schedule_refresh)
         self.fetch_all_async()  # Initial load
+        self.schedule_refresh()
 
-        # Temporary alarm refresh (10s)
-        self.temp_alarm_timer = QTimer()
-        self.temp_alarm_timer.timeout.connect(self.fetch_temp_alarm_only)
-        self.temp_alarm_timer.start(10000)
-        self.fetch_temp_alarm_only()
+        # Alarm / memo changes are pushed by the server into the local replica
+        # (replaces the 10s temp alarm poll)
+        self.remote_changed.connect(lambda revision: self.fetch_all_async())
+        api_client.replica.subscribe(self.remote_changed.emit)
 
     def update_time_only(self):
         now = datetime.datetime.now()
         self.date_label.setText(now.strftime("%Y-%m-%d (%A)"))
         self.time_label.setText(now.strftime("%H:%M:%S"))
 
+    def schedule_refresh(self):
+        self.data_timer.start(int(poll_policy.interval(60, minimum=15, maximum=600) * 1000))
+
     def fetch_all_async(self):
-        def run():
-            weather = get_weather()
-            regular_memo = get_regular_memo()
-            date_memos = get_date_memos()
-            regular_alarms = get_regular_alarms()
-            temp_alarm = get_temporary_alarm()
-            self.weather_cache = weather
-            self.memo_cache = {
-                "regular": regular_memo,
-                "date_memos": date_memos,
-            }
-            self.alarm_cache = {
-                "regular": regular_alarms,
-                "temp": temp_alarm,
-            }
-            self.data_updated.emit()
-        threading.Thread(target=run).start()
-
-    def fetch_temp_alarm_only(self):
-        def run():
-            temp_alarm = get_temporary_alarm()
-            self.alarm_cache["temp"] = temp_alarm
-            self.data_updated.emit()
-        threading.Thread(target=run).start()
-
-    def update_info(self):
+        # One snapshot read instead of one per widget; the result is stored
+        # by update_info on the GUI thread
+        task_pool.submit("clock_screen", get_dashboard, self.data_updated.emit)
+
+    def update_info(self, dashboard):
+        self.weather_cache = dashboard["weather"]
+        self.memo_cache = dashboard["memo"]
+        self.alarm_cache = dashboard["alarm"]
+
         w = self.weather_cache
         self.weather_label.setText(f"☁ Weather: {w['weather']} {w['temperature']}")
         self.dust_label.setText(f"🌫 Fine Dust: {w['dust']}")
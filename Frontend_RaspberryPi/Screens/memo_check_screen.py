@@ -1,12 +1,15 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout, QScrollArea, QSizePolicy
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
-import threading
 from Services.memo_loader import get_regular_memo, get_date_memos
 from Services.alarm_manager import get_regular_alarms
+from Services.api_client import api_client
+from Services.task_pool import task_pool
+from Services.poll_policy import poll_policy
 from datetime import datetime
 
 class MemoCheckScreen(QWidget):
-    memo_updated = pyqtSignal()
+    memo_updated = pyqtSignal(object)
+    remote_changed = pyqtSignal(int)
 
     def __init__(self, controller):
         super().__init__()
@@ -74,11 +77,16 @@ class MemoCheckScreen(QWidget):
             "alarms": []
         }
 
-        # Timer to refresh memos (every 60s)
+        # Memos are refreshed when the local replica synced a change;
+        # the timer is only a fallback (every 5 min, adapted by the poll policy)
         self.memo_timer = QTimer()
+        self.memo_timer.setSingleShot(True)
         self.memo_timer.timeout.connect(self.fetch_memo_async)
-        self.memo_timer.start(60000)
+        self.memo_timer.timeout.connect(self.schedule_refresh)
+        self.schedule_refresh()
         self.memo_updated.connect(self.update_info)
+        self.remote_changed.connect(lambda revision: self.fetch_memo_async())
+        api_client.replica.subscribe(self.remote_changed.emit)
         self.fetch_memo_async()  # Initial load
 
     def create_memo_box(self, title, content):
@@ -105,18 +113,21 @@ class MemoCheckScreen(QWidget):
 
         return box
 
+    def schedule_refresh(self):
+        self.memo_timer.start(int(poll_policy.interval(300, minimum=60, maximum=3600) * 1000))
+
     def fetch_memo_async(self):
         def run():
-            regular_memo = get_regular_memo()
-            date_memos = get_date_memos()
-            alarms = get_regular_alarms()
-            self.memo_cache["regular"] = regular_memo
-            self.memo_cache["date_memos"] = date_memos
-            self.memo_cache["alarms"] = alarms
-            self.memo_updated.emit()
-        threading.Thread(target=run).start()
-
-    def update_info(self):
+            return {
+                "regular": get_regular_memo(),
+                "date_memos": get_date_memos(),
+                "alarms": get_regular_alarms()
+            }
+        task_pool.submit("memo_check_screen", run, self.memo_updated.emit)
+
+    def update_info(self, memo_cache):
+        self.memo_cache = memo_cache
+
         # Clear existing widgets
         for i in reversed(range(self.content_layout.count())): 
             widget = self.content_layout.itemAt(i).widget()
@@ -1,37 +1,20 @@
-import requests
-from datetime import datetime
+from Services.api_client import api_client
 
-API_BASE_URL = "http://127.0.0.1:5000"
+# Alarms of this device, read from the local replica; the display views come
+# from the shared snapshot (see Services/api_client.py)
 
 def get_regular_alarms():
-    today = datetime.now()
-    weekday = str(today.weekday())  # Monday=0, Sunday=6
-    try:
-        response = requests.get(f"{API_BASE_URL}/api/alarms")
-        response.raise_for_status()
-        alarms = response.json()
-        result = []
-        for alarm in alarms:
-            if alarm['is_active'] and not alarm['specific_date']:
-                if alarm['days'] and weekday in alarm['days'].split(','):
-                    result.append((alarm['time'], alarm['label']))
-        return result
-    except:
-        return []
+    # Active regular alarms of today's weekday: [(time, label)]
+    return api_client.snapshot().regular_alarms
 
 def get_temporary_alarm():
-    today = datetime.now().strftime('%Y-%m-%d')
-    try:
-        response = requests.get(f"{API_BASE_URL}/api/alarms")
-        response.raise_for_status()
-        alarms = response.json()
-        upcoming = sorted(
-            [a for a in alarms if a['is_active'] and a['specific_date'] and a['specific_date'] >= today],
-            key=lambda x: (x['specific_date'], x['time'])
-        )
-        if upcoming:
-            a = upcoming[0]
-            return f"{a['time']} ({a['label']} - {a['specific_date']})"
-        return None
-    except:
-        return None
\ No newline at end of file
+    # The next temporary alarm, formatted for display (None if there is none)
+    return api_client.snapshot().temp_alarm
+
+def get_active_alarms():
+    # Every active alarm of this device, for the on-device scheduler
+    return api_client.replica.active_alarms()
+
+def report_fired(alarm_id):
+    # Lets the server move the alarm's next fire time on
+    api_client.post(f"/api/alarms/{alarm_id}/fired")
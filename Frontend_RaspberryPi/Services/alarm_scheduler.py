@@ -0,0 +1,112 @@
+import heapq
+from datetime import date, datetime, timedelta
+
+# Alarms missed by more than this (Pi switched off or suspended, clock jumped
+# forward) are skipped instead of ringing late
+MISSED_FIRE_GRACE = timedelta(minutes=10)
+
+
+def next_fire(alarm, after):
+    # Same rules as Alarm.compute_next_fire on the server:
+    # days use datetime.weekday() numbering (Monday=0)
+    if not alarm.get("is_active", True):
+        return None
+    try:
+        hour, minute = (int(part) for part in alarm["time"].split(":"))
+    except (AttributeError, KeyError, ValueError):
+        return None
+
+    if alarm.get("specific_date"):
+        try:
+            d = date.fromisoformat(alarm["specific_date"])
+        except ValueError:
+            return None
+        fire_at = datetime(d.year, d.month, d.day, hour, minute)
+        return fire_at if fire_at > after else None
+
+    days = {int(day) for day in (alarm.get("days") or "").split(",") if day.strip().isdigit()}
+    for offset in range(8):
+        d = after.date() + timedelta(days=offset)
+        if d.weekday() in days:
+            fire_at = datetime(d.year, d.month, d.day, hour, minute)
+            if fire_at > after:
+                return fire_at
+    return None
+
+
+def _plan_key(alarm):
+    # Fields that decide when an alarm fires; other edits (label) keep its entry
+    return (alarm.get("time"), alarm.get("days"), alarm.get("specific_date"), alarm.get("is_active", True))
+
+
+# Next fire time of every alarm in a min-heap: the caller arms one timer for
+# next_fire_at() and calls pop_due() when it expires. Entries of changed or
+# removed alarms are not searched for; their version no longer matches and they
+# are dropped when they reach the top.
+class AlarmScheduler:
+    def __init__(self, grace=MISSED_FIRE_GRACE):
+        self.grace = grace
+        self._alarms = {}    # id -> alarm dict
+        self._versions = {}  # id -> version of its live heap entry
+        self._heap = []      # (fire_at, id, version)
+
+    def update(self, alarms, now):
+        # Re-plans only the alarms that were added, rescheduled or removed
+        seen = set()
+        for alarm in alarms:
+            alarm_id = alarm["id"]
+            seen.add(alarm_id)
+            previous = self._alarms.get(alarm_id)
+            self._alarms[alarm_id] = alarm
+            if previous is None or _plan_key(previous) != _plan_key(alarm):
+                self._push(alarm_id, next_fire(alarm, now))
+
+        for alarm_id in set(self._alarms) - seen:
+            del self._alarms[alarm_id]
+            self._versions[alarm_id] += 1
+
+        # Stale entries only leave the heap at the top; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._alarms) + 16:
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+
+    def replan(self, now):
+        # Every alarm from scratch (after the clock was set back)
+        self._heap = []
+        for alarm_id, alarm in self._alarms.items():
+            self._push(alarm_id, next_fire(alarm, now))
+
+    def next_fire_at(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        # Returns (fired, missed): lists of (alarm, fire_at) that are due by now,
+        # split by whether they are still within the grace period.
+        # Each alarm is rescheduled after the start of the grace period, so one
+        # that was missed for several days is reported once and its latest
+        # occurrence still rings if it is recent enough.
+        fired, missed = [], []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            fire_at, alarm_id, _ = heapq.heappop(self._heap)
+            alarm = self._alarms[alarm_id]
+            (fired if now - fire_at <= self.grace else missed).append((alarm, fire_at))
+            self._push(alarm_id, next_fire(alarm, max(fire_at, now - self.grace)))
+        return fired, missed
+
+    def _push(self, alarm_id, fire_at):
+        version = self._versions.get(alarm_id, 0) + 1
+        self._versions[alarm_id] = version
+        if fire_at is not None:
+            heapq.heappush(self._heap, (fire_at, alarm_id, version))
+
+    def _is_live(self, entry):
+        _, alarm_id, version = entry
+        return alarm_id in self._alarms and self._versions[alarm_id] == version
+
+    def _drop_stale(self):
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
@@ -0,0 +1,223 @@
+import os
+import threading
+import time
+from datetime import datetime
+import requests
+from Services.local_replica import LocalReplica, SYNC_INTERVAL
+from Services.poll_policy import poll_policy
+
+API_BASE_URL = "http://127.0.0.1:5000"
+
+# Sent as X-Device-ID with every request: the server keeps the alarms and memos
+# of each device apart. Set ALARM_DEVICE_ID to give this Pi its own data set;
+# without it the Pi shares the default device with the web page.
+DEVICE_ID = os.environ.get("ALARM_DEVICE_ID", "default")
+DEVICE_HEADERS = {"X-Device-ID": DEVICE_ID}
+
+# Local copy of this device's alarms and memos (see Services/local_replica.py)
+REPLICA_PATH = os.environ.get("ALARM_REPLICA_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), f"replica_{DEVICE_ID}.db")
+
+# Seconds a snapshot is reused before the next read builds a new one
+# (and downloads the weather again)
+SNAPSHOT_TTL = 10
+
+# Per-call deadlines in seconds: connecting may take at most CONNECT_TIMEOUT
+# (the server is on the LAN), and reading at most the call's deadline
+CONNECT_TIMEOUT = 3
+REQUEST_DEADLINE = 10
+WEATHER_DEADLINE = 5
+
+# Consecutive failures (connection errors, timeouts, 5xx) that open the breaker,
+# and the range of its probe backoff in seconds
+FAILURE_THRESHOLD = 3
+PROBE_BACKOFF_MIN = 5
+PROBE_BACKOFF_MAX = 300
+
+
+# Raised instead of sending a request while the breaker is open; a
+# ConnectionError, so callers handle it like an unreachable server
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    pass
+
+
+# Fails calls immediately while the server is unhealthy, instead of letting
+# every timer tick wait for its timeout. After FAILURE_THRESHOLD consecutive
+# failures the breaker opens. Once its backoff has passed, a single call goes
+# through as a probe: success closes the breaker, failure reopens it with
+# twice the backoff (up to PROBE_BACKOFF_MAX). Calls that may block for long
+# (the long-poll) pass probe=False: they never hold the probe slot and fail
+# while the breaker is open.
+class CircuitBreaker:
+    def __init__(self, threshold=FAILURE_THRESHOLD, backoff_min=PROBE_BACKOFF_MIN, backoff_max=PROBE_BACKOFF_MAX):
+        self.threshold = threshold
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.backoff = backoff_min
+        self.failures = 0
+        self.open_until = None  # monotonic time, None while closed
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self, probe=True):
+        with self._lock:
+            if self.open_until is None:
+                return
+            remaining = self.open_until - time.monotonic()
+            if self._probing or remaining > 0 or not probe:
+                raise CircuitOpenError(f"Server unavailable (next probe in {max(remaining, 0):.0f}s)")
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self.open_until is not None:
+                print("[API Client] Server reachable again")
+            self.failures = 0
+            self.backoff = self.backoff_min
+            self.open_until = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing:
+                self.backoff = min(self.backoff * 2, self.backoff_max)
+            elif self.open_until is not None or self.failures < self.threshold:
+                return
+            self._probing = False
+            self.open_until = time.monotonic() + self.backoff
+            print(f"[API Client] Server unreachable, next probe in {self.backoff:.0f}s")
+
+
+def format_temp_alarm(alarm):
+    if not alarm:
+        return None
+    return f"{alarm['time']} ({alarm['label']} - {alarm['specific_date']})"
+
+
+# Everything the screens and the CLI show: the replica's dashboard view plus the
+# weather, which is the only part read from the server. The views are derived
+# once here instead of by every screen on every refresh.
+# error: why the weather could not be loaded (shown in its place)
+class Snapshot:
+    def __init__(self, data=None, error=None):
+        data = data or {}
+        weather = data.get("weather") or {}
+        self.error = error
+        self.date = data.get("date")
+        self.revision = data.get("revision")
+        self.fetched_at = time.monotonic()
+        self.weather = {
+            "weather": error or weather.get("weather", "Unavailable"),
+            "temperature": weather.get("temperature", "N/A"),
+            "dust": weather.get("dust", "Unavailable")
+        }
+        self.regular_memo = data.get("regular_memo", "")
+        self.today_memo = data.get("today_memo", "")
+        self.date_memos = data.get("date_memos", {})
+        self.regular_alarms = [tuple(alarm) for alarm in data.get("regular_alarms", [])]
+        self.temp_alarms = [tuple(alarm) for alarm in data.get("temp_alarms", [])]
+        self.temp_alarm = format_temp_alarm(data.get("temp_alarm"))
+
+
+# One client per process: a single keep-alive session for every request, the
+# local replica, and the latest snapshot shared by all screens. Concurrent
+# reads of an expired snapshot wait for one build instead of each starting
+# their own.
+class ApiClient:
+    def __init__(self, base_url=API_BASE_URL, ttl=SNAPSHOT_TTL, deadline=REQUEST_DEADLINE,
+                 replica_path=REPLICA_PATH):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.deadline = deadline
+        self.session = requests.Session()
+        self.session.headers.update(DEVICE_HEADERS)
+        self.breaker = CircuitBreaker()
+        self.replica = LocalReplica(replica_path, self.get_changes, source=f"{base_url} {DEVICE_ID}",
+                                    interval=lambda: poll_policy.interval(SYNC_INTERVAL, minimum=60, maximum=3600))
+        self.replica.subscribe(poll_policy.note_change)
+        self._snapshot = None
+        self._inflight = None
+        self._lock = threading.Lock()
+
+    def request(self, method, path, deadline=None, probe=True, **kwargs):
+        # deadline: seconds allowed for this call (default: the client's)
+        # probe: whether this call may be the breaker's half-open probe
+        deadline = deadline or self.deadline
+        self.breaker.before_call(probe)
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}",
+                                            timeout=(min(CONNECT_TIMEOUT, deadline), deadline), **kwargs)
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        response.raise_for_status()
+        return response
+
+    # Writes go to the server; the replica picks them up with its next sync,
+    # started right away
+    def post(self, path, **kwargs):
+        response = self.request("POST", path, **kwargs)
+        self.replica.sync_soon()
+        return response
+
+    def delete(self, path, **kwargs):
+        response = self.request("DELETE", path, **kwargs)
+        self.replica.sync_soon()
+        return response
+
+    def get_changes(self, since):
+        return self.request("GET", "/api/changes", params={"since": since, "limit": 1000}).json()
+
+    def snapshot(self):
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            if self._is_fresh(self._snapshot, today):
+                return self._snapshot
+            inflight = self._inflight
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight = {"event": threading.Event(), "snapshot": None}
+
+        if not leader:
+            inflight["event"].wait(WEATHER_DEADLINE + 1)
+            return inflight["snapshot"] or self._fetch()
+
+        snapshot = None
+        try:
+            snapshot = self._fetch()
+        finally:
+            with self._lock:
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                inflight["snapshot"] = snapshot
+                self._inflight = None
+            inflight["event"].set()
+        return snapshot
+
+    def _is_fresh(self, snapshot, today):
+        if snapshot is None or snapshot.date != today:
+            return False
+        if time.monotonic() - snapshot.fetched_at >= self.ttl:
+            return False
+        return snapshot.revision == self.replica.revision
+
+    def _fetch(self):
+        data = self.replica.dashboard(datetime.now())
+        try:
+            data["weather"] = self.request("GET", "/api/weather", deadline=WEATHER_DEADLINE).json()
+            return Snapshot(data)
+        except requests.exceptions.ConnectionError:
+            return Snapshot(data, error="Server connection failed")
+        except requests.exceptions.Timeout:
+            return Snapshot(data, error="Request timed out")
+        except Exception as e:
+            print(f"[API Client Error] {e}")
+            return Snapshot(data, error="Network error")
+
+
+api_client = ApiClient()
@@ -0,0 +1,63 @@
+import threading
+import time
+from Services.api_client import api_client
+from Services.poll_policy import poll_policy
+
+# Longest wait the server allows (LONG_POLL_MAX_TIMEOUT of /api/wait)
+MAX_POLL_TIMEOUT = 55
+
+# Long-polls /api/wait on one background thread and calls every subscriber
+# (with the new revision) when an alarm or memo changes on the server.
+# Changes arrive as soon as they happen either way; at night or while nothing
+# changes, each wait is made longer (up to MAX_POLL_TIMEOUT) so that fewer
+# requests are sent. Requests go through the shared client and its breaker;
+# while the breaker is open the listener asks without `since`, which the server
+# answers at once, so a held long-poll never blocks the breaker's probe.
+# Callbacks run on the listener thread: GUI code should only emit a Qt signal.
+class ChangeListener:
+    def __init__(self, poll_timeout=25):
+        self.poll_timeout = poll_timeout
+        self.revision = None
+        self._callbacks = []
+        self._thread = None
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        backoff = 1
+        while True:
+            try:
+                timeout = round(poll_policy.interval(self.poll_timeout, minimum=self.poll_timeout,
+                                                     maximum=MAX_POLL_TIMEOUT))
+                params = {"timeout": timeout}
+                probe = api_client.breaker.open_until is not None
+                if self.revision is not None and not probe:
+                    params["since"] = self.revision
+                response = api_client.request("GET", "/api/wait", params=params, deadline=timeout + 10,
+                                              probe=probe)
+                revision = response.json()["revision"]
+                changed = self.revision is not None and revision != self.revision
+                self.revision = revision
+                backoff = 1
+                if changed:
+                    self._notify(revision)
+            except Exception as e:
+                print(f"[Change Listener] {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _notify(self, revision):
+        for callback in list(self._callbacks):
+            try:
+                callback(revision)
+            except Exception as e:
+                print(f"[Change Listener Callback Error] {e}")
+
+
+change_listener = ChangeListener()
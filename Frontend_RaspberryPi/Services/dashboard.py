@@ -0,0 +1,16 @@
+from Services.api_client import api_client
+
+def get_dashboard():
+    # Everything the clock screen shows, from the shared snapshot
+    snapshot = api_client.snapshot()
+    return {
+        "weather": dict(snapshot.weather),
+        "memo": {
+            "regular": snapshot.regular_memo,
+            "date_memos": snapshot.date_memos,
+        },
+        "alarm": {
+            "regular": snapshot.regular_alarms,
+            "temp": snapshot.temp_alarm,
+        },
+    }
@@ -0,0 +1,195 @@
+import sqlite3
+import threading
+from datetime import datetime
+from Services.alarm_scheduler import next_fire
+
+# Same limit as /api/dashboard
+UPCOMING_TEMP_ALARMS = 10
+# Seconds between syncs when no change is reported (and the retry delay cap)
+SYNC_INTERVAL = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alarm (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    label TEXT,
+    days TEXT,
+    specific_date TEXT,
+    is_active INTEGER
+);
+CREATE TABLE IF NOT EXISTS memo (
+    id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    date TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_memo_date ON memo (date, created_at, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ALARM_FIELDS = ("id", "time", "label", "days", "specific_date", "is_active")
+MEMO_FIELDS = ("id", "content", "date", "created_at")
+
+
+# Copy of this device's alarms and memos in a local SQLite file, kept up to
+# date from /api/changes by a background thread. Every read is a local query,
+# so the screens and the alarm scheduler keep working while the server or the
+# network is down; writes still go to the server and come back through a sync.
+#
+# fetch_changes(since) returns one /api/changes page. The revision of the last
+# applied page is stored with the data, so a restart continues from there.
+# interval() gives the seconds until the next sync when nothing is reported.
+class LocalReplica:
+    def __init__(self, path, fetch_changes, source=None, interval=lambda: SYNC_INTERVAL):
+        self.path = path
+        self.fetch_changes = fetch_changes
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._callbacks = []
+        self._wakeup = threading.Event()
+        self._synced = threading.Event()
+        self._thread = None
+
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            # A replica of another server starts over
+            if source is not None and self._meta("source") != source:
+                self._conn.execute("DELETE FROM meta")
+                self._set_meta("source", source)
+        self.revision = int(self._meta("revision") or 0)
+
+    # ----------------------------
+    # Sync
+    # ----------------------------
+    def subscribe(self, callback):
+        # Called with the new revision after a sync applied changes
+        # (on the sync thread: GUI code should only emit a Qt signal)
+        self._callbacks.append(callback)
+
+    def start(self, listener=None):
+        # listener: a ChangeListener whose notifications trigger a sync
+        if listener is not None:
+            listener.subscribe(lambda revision: self.sync_soon())
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def sync_soon(self):
+        self._wakeup.set()
+
+    def wait_synced(self, timeout):
+        # True once a sync has completed since start()
+        return self._synced.wait(timeout)
+
+    def sync(self):
+        # Applies pages until the replica is current; True if anything changed
+        changed = False
+        while True:
+            page = self.fetch_changes(self.revision)
+            changed = self._apply(page) or changed
+            if not page["has_more"]:
+                return changed
+
+    def _run(self):
+        retry = None
+        while True:
+            try:
+                changed = self.sync()
+                self._synced.set()
+                retry = None
+                if changed:
+                    self._notify()
+            except Exception as e:
+                print(f"[Local Replica] Sync failed, serving local data: {e}")
+                retry = min(retry * 2, SYNC_INTERVAL) if retry else 5
+            self._wakeup.wait(retry or self.interval())
+            self._wakeup.clear()
+
+    def _apply(self, page):
+        # One transaction per page: a failed sync never leaves half a page
+        full = page["reset"] or self.revision == 0
+        rows = page["alarms"] or page["memos"] or page["deleted"]["alarms"] or page["deleted"]["memos"]
+        with self._lock, self._conn:
+            if full:
+                self._conn.execute("DELETE FROM alarm")
+                self._conn.execute("DELETE FROM memo")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO alarm (id, time, label, days, specific_date, is_active) VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(alarm.get(field) for field in ALARM_FIELDS) for alarm in page["alarms"]])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO memo (id, content, date, created_at) VALUES (?, ?, ?, ?)",
+                [tuple(memo.get(field) for field in MEMO_FIELDS) for memo in page["memos"]])
+            self._conn.executemany("DELETE FROM alarm WHERE id = ?", [(i,) for i in page["deleted"]["alarms"]])
+            self._conn.executemany("DELETE FROM memo WHERE id = ?", [(i,) for i in page["deleted"]["memos"]])
+            self._set_meta("revision", page["revision"])
+        changed = full or bool(rows) or page["revision"] != self.revision
+        self.revision = page["revision"]
+        return changed
+
+    def _notify(self):
+        for callback in list(self._callbacks):
+            try:
+                callback(self.revision)
+            except Exception as e:
+                print(f"[Local Replica Callback Error] {e}")
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def active_alarms(self):
+        alarms = self._query("SELECT id, time, label, days, specific_date, is_active FROM alarm WHERE is_active")
+        for alarm in alarms:
+            alarm["is_active"] = bool(alarm["is_active"])
+        return alarms
+
+    def dashboard(self, now=None):
+        # Same content as GET /api/dashboard (without the weather)
+        now = now or datetime.now()
+        today = now.strftime('%Y-%m-%d')
+        weekday = now.weekday()  # Monday=0, Sunday=6
+
+        regular_memo = self._query(
+            "SELECT content FROM memo WHERE date IS NULL ORDER BY created_at DESC, id DESC LIMIT 1")
+        date_memos = {}
+        today_memo = ""
+        for memo in self._query(
+                "SELECT content, date FROM memo WHERE date >= ? ORDER BY date, created_at, id", (today,)):
+            date_memos.setdefault(memo["date"], []).append(memo["content"])
+            if memo["date"] == today:
+                today_memo = memo["content"]  # the newest one wins
+
+        alarms = self.active_alarms()
+        regular_alarms = [[alarm["time"], alarm["label"]] for alarm in sorted(alarms, key=lambda a: a["id"])
+                          if not alarm["specific_date"]
+                          and str(weekday) in (alarm["days"] or "").replace(" ", "").split(",")]
+        upcoming = sorted((fire_at, alarm["id"], alarm) for alarm in alarms if alarm["specific_date"]
+                          for fire_at in [next_fire(alarm, now)] if fire_at is not None)
+        temp_alarms = [alarm for _, _, alarm in upcoming[:UPCOMING_TEMP_ALARMS]]
+
+        return {
+            "date": today,
+            "weekday": weekday,
+            "revision": self.revision,
+            "regular_memo": regular_memo[0]["content"] if regular_memo else "",
+            "today_memo": today_memo,
+            "date_memos": {day: " | ".join(contents) for day, contents in date_memos.items()},
+            "regular_alarms": regular_alarms,
+            "temp_alarm": temp_alarms[0] if temp_alarms else None,
+            "temp_alarms": [[alarm["time"], alarm["label"], alarm["specific_date"]] for alarm in temp_alarms]
+        }
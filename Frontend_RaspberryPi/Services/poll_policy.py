@@ -0,0 +1,61 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Local hours [start, end) treated as night: background refreshes slow down
+NIGHT_START_HOUR = 0
+NIGHT_END_HOUR = 6
+# Before an alarm the data is refreshed more often, so the ringing screen
+# shows fresh memos and weather and last-minute alarm edits are not missed
+PRE_ALARM_WINDOW = timedelta(minutes=15)
+# Data that has not changed for this many seconds counts as stable
+STABLE_AFTER = 3600
+
+FAST_FACTOR = 0.25
+NIGHT_FACTOR = 4
+STABLE_FACTOR = 2
+
+
+# Scales the fallback polling intervals of the Pi (screen refreshes, replica
+# sync, long-poll timeout) instead of using fixed ones:
+# - within PRE_ALARM_WINDOW of the next alarm:   base * FAST_FACTOR
+# - otherwise at night:                          base * NIGHT_FACTOR
+# - and when nothing changed for STABLE_AFTER:   base * STABLE_FACTOR
+# A slow interval never runs past the start of the pre-alarm window.
+# next_alarm_at is set by the alarm scheduler; note_change() by the replica.
+class PollPolicy:
+    def __init__(self):
+        self.next_alarm_at = None
+        self._last_change = time.monotonic()
+        self._lock = threading.Lock()
+
+    def note_change(self, *args):
+        with self._lock:
+            self._last_change = time.monotonic()
+
+    def interval(self, base, minimum=None, maximum=None, now=None):
+        # Seconds until the next poll of something normally polled every `base`
+        now = now or datetime.now()
+        next_alarm_at = self.next_alarm_at
+        if next_alarm_at is not None and now <= next_alarm_at <= now + PRE_ALARM_WINDOW:
+            factor = FAST_FACTOR
+        else:
+            factor = 1
+            if NIGHT_START_HOUR <= now.hour < NIGHT_END_HOUR:
+                factor *= NIGHT_FACTOR
+            with self._lock:
+                stable = time.monotonic() - self._last_change >= STABLE_AFTER
+            if stable:
+                factor *= STABLE_FACTOR
+
+        seconds = base * factor
+        if factor > FAST_FACTOR and next_alarm_at is not None and next_alarm_at > now:
+            seconds = min(seconds, (next_alarm_at - PRE_ALARM_WINDOW - now).total_seconds())
+        if minimum is not None:
+            seconds = max(seconds, minimum)
+        if maximum is not None:
+            seconds = min(seconds, maximum)
+        return seconds
+
+
+poll_policy = PollPolicy()
@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+
+
+# Background I/O of the GUI (screen refreshes, alarm reports) on a fixed
+# number of threads. Tasks are keyed by what they fetch: one submitted while
+# a task with the same key is running is merged into a single follow-up run
+# (the newest function wins), so the ticks of a slow or stalled fetch never
+# pile up. At most one running and one waiting task exist per key.
+#
+# The result is passed to `callback` on the worker thread; GUI code passes a
+# Qt signal's emit, which delivers it on the GUI thread.
+class TaskPool:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task-pool")
+        self._lock = threading.Lock()
+        self._active = set()    # keys queued or running
+        self._followups = {}    # key -> (fn, callback) to run when the active one is done
+
+    def submit(self, key, fn, callback=None):
+        # Returns False when the task was merged into the key's follow-up run
+        with self._lock:
+            if key in self._active:
+                self._followups[key] = (fn, callback)
+                return False
+            self._active.add(key)
+        self._executor.submit(self._run, key, fn, callback)
+        return True
+
+    def _run(self, key, fn, callback):
+        while True:
+            try:
+                result = fn()
+                if callback is not None:
+                    callback(result)
+            except Exception as e:
+                print(f"[Task Pool] {key} failed: {e}")
+            with self._lock:
+                followup = self._followups.pop(key, None)
+                if followup is None:
+                    self._active.discard(key)
+                    return
+            fn, callback = followup
+
+
+task_pool = TaskPool()
@@ -1,37 +1,23 @@
 import os
 import datetime
-import requests
 import cv2
 import time
+# Same client, device identity (ALARM_DEVICE_ID), local replica and snapshot as the GUI
+from Services.api_client import api_client
+from Services.change_listener import change_listener
 
-API_BASE_URL = "http://127.0.0.1:5000"
+# Seconds the first screen waits for the replica to sync (it is shown from the
+# local copy afterwards either way)
+STARTUP_SYNC_WAIT = 5
 
 def clear():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def get_regular_memo():
-    try:
-        r = requests.get(f"{API_BASE_URL}/api/memos")
-        r.raise_for_status()
-        memos = r.json()
-        rmemos = [m for m in memos if not m['date']]
-        rmemos = sorted(rmemos, key=lambda x: x['created_at'])
-        return rmemos[-1]['content'] if rmemos else ""
-    except:
-        return ""
+    return api_client.snapshot().regular_memo
 
 def get_today_memo():
-    today = datetime.datetime.now().strftime('%Y-%m-%d')
-    try:
-        r = requests.get(f"{API_BASE_URL}/api/memos")
-        r.raise_for_status()
-        memos = r.json()
-        for m in sorted(memos, key=lambda x: x['created_at'], reverse=True):
-            if m['date'] == today:
-                return m['content']
-        return ""
-    except:
-        return ""
+    return api_client.snapshot().today_memo
 
 def camera_available():
     cap = cv2.VideoCapture(0)
@@ -116,37 +102,14 @@ def display_alarm_screen():
         input("\n[Unknown input] Press Enter to return.")
 
 def get_weather():
-    try:
-        r = requests.get(f"{API_BASE_URL}/api/weather", timeout=5)
-        r.raise_for_status()
-        d = r.json()
-        return {
-            "weather": d.get("weather", "N/A"),
-            "temperature": d.get("temperature", "N/A"),
-            "dust": d.get("dust", "N/A")
-        }
-    except:
-        return {"weather": "N/A", "temperature": "N/A", "dust": "N/A"}
+    return api_client.snapshot().weather
 
 def get_regular_alarms():
-    weekday = str(datetime.datetime.now().weekday())
-    try:
-        r = requests.get(f"{API_BASE_URL}/api/alarms")
-        r.raise_for_status()
-        alarms = r.json()
-        return [(a['time'], a.get('label', "")) for a in alarms if a['is_active'] and not a['specific_date'] and weekday in a.get('days', '')]
-    except:
-        return []
+    return api_client.snapshot().regular_alarms
 
 def get_temp_alarms():
-    today = datetime.datetime.now().strftime('%Y-%m-%d')
-    try:
-        r = requests.get(f"{API_BASE_URL}/api/alarms")
-        r.raise_for_status()
-        alarms = r.json()
-        return [(a['time'], a.get('label', ''), a['specific_date']) for a in alarms if a['is_active'] and a['specific_date'] and a['specific_date'] >= today]
-    except:
-        return []
+    # Upcoming temporary alarms: [(time, label, date)]
+    return api_client.snapshot().temp_alarms
 
 def display_clock():
     now = datetime.datetime.now()
@@ -176,6 +139,9 @@ def display_memo():
     print("\nRegular Alarms: " + ", ".join([a[0] for a in reg_alarms]) if reg_alarms else "Regular Alarms: None")
 
 def main():
+    api_client.replica.start(change_listener)
+    change_listener.start()
+    api_client.replica.wait_synced(STARTUP_SYNC_WAIT)
     mode = "clock"
     while True:
         clear()
@@ -1,14 +1,30 @@
 import sys
+import time
+from functools import partial
+from datetime import datetime
 from PyQt6.QtWidgets import QApplication, QStackedWidget
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from Screens.clock_screen import ClockScreen
 from Screens.alarm_set_screen import AlarmSetScreen
 from Screens.alarm_ring_screen import AlarmRingScreen
 from Screens.memo_check_screen import MemoCheckScreen
-from Services.memo_loader import get_regular_memo
-import requests
+from Services.api_client import api_client
+from Services.change_listener import change_listener
+from Services.alarm_manager import get_active_alarms, report_fired
+from Services.alarm_scheduler import AlarmScheduler
+from Services.task_pool import task_pool
+from Services.poll_policy import poll_policy
+
+# The scheduler timer is armed for the next alarm but never for longer than
+# this, so that a wall-clock change (NTP sync on a Pi without RTC, suspend)
+# delays an alarm by at most this many seconds
+CLOCK_CHECK_INTERVAL = 60
+# Difference between wall-clock and monotonic time treated as a clock change
+CLOCK_JUMP_TOLERANCE = 2
 
 class SmartAlarmApp(QStackedWidget):
+    remote_changed = pyqtSignal(int)
+
     def __init__(self):
         super().__init__()
 
@@ -31,6 +47,63 @@ class SmartAlarmApp(QStackedWidget):
         self.addWidget(self.alarm_ring_screen)
         self.setCurrentWidget(self.screens[0])
 
+        self.setup_scheduler()
+
+    # ----------------------------
+    # Alarm scheduling
+    # ----------------------------
+    # One single-shot timer for the earliest alarm of the scheduler's heap;
+    # alarm edits synced into the local replica re-plan only the alarms that
+    # changed. Alarms come from the replica, so they ring while the server is down.
+    def setup_scheduler(self):
+        self.scheduler = AlarmScheduler()
+        self.scheduler_timer = QTimer(self)
+        self.scheduler_timer.setSingleShot(True)
+        self.scheduler_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.scheduler_timer.timeout.connect(self.on_scheduler_timeout)
+
+        self.remote_changed.connect(lambda revision: self.update_schedule())
+        api_client.replica.subscribe(self.remote_changed.emit)
+        self.update_schedule()
+
+    def update_schedule(self):
+        self.scheduler.update(get_active_alarms(), datetime.now())
+        self.arm_scheduler()
+
+    def arm_scheduler(self):
+        delay = CLOCK_CHECK_INTERVAL
+        next_fire_at = self.scheduler.next_fire_at()
+        # Background refreshes speed up shortly before it
+        poll_policy.next_alarm_at = next_fire_at
+        if next_fire_at is not None:
+            delay = min(delay, max(0, (next_fire_at - datetime.now()).total_seconds()))
+        self.armed_at = (datetime.now(), time.monotonic())
+        self.scheduler_timer.start(int(delay * 1000))
+
+    def on_scheduler_timeout(self):
+        now = datetime.now()
+        armed_wall, armed_monotonic = self.armed_at
+        jump = (now - armed_wall).total_seconds() - (time.monotonic() - armed_monotonic)
+        if jump < -CLOCK_JUMP_TOLERANCE:
+            # Set back: alarms planned after the wrong time may now be too late
+            print(f"[Alarm Scheduler] Clock set back by {-jump:.0f}s, re-planning")
+            self.scheduler.replan(now)
+        elif jump > CLOCK_JUMP_TOLERANCE:
+            # Set forward (or resumed): alarms passed meanwhile are due below
+            print(f"[Alarm Scheduler] Clock moved forward by {jump:.0f}s")
+
+        fired, missed = self.scheduler.pop_due(now)
+        for alarm, fire_at in missed:
+            print(f"[Alarm Scheduler] Missed {alarm['time']} ({alarm.get('label')}) due at {fire_at}")
+        for alarm, fire_at in fired:
+            print(f"[Alarm Scheduler] Alarm {alarm['time']} ({alarm.get('label')})")
+        if fired and self.currentWidget() is not self.alarm_ring_screen:
+            self.setCurrentWidget(self.alarm_ring_screen)
+        if fired or missed:
+            for alarm_id in dict.fromkeys(alarm['id'] for alarm, _ in fired + missed):
+                task_pool.submit(f"report_fired:{alarm_id}", partial(report_fired, alarm_id))
+        self.arm_scheduler()
+
     def keyPressEvent(self, event):
         key = event.key()
         if key == Qt.Key.Key_Left:
@@ -59,4 +132,7 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = SmartAlarmApp()
     window.show()
+    # The replica syncs at startup and whenever the server reports a change
+    api_client.replica.start(change_listener)
+    change_listener.start()
     sys.exit(app.exec())
\ No newline at end of file
@@ -8,11 +8,7 @@ else:
     SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 FILES_TO_UPDATE = [
-    os.path.join(SCRIPT_DIR, "Frontend_RaspberryPi/Screens/alarm_set_screen.py"),
-    os.path.join(SCRIPT_DIR, "Frontend_RaspberryPi/Services/alarm_manager.py"),
-    os.path.join(SCRIPT_DIR, "Frontend_RaspberryPi/Services/memo_loader.py"),
-    os.path.join(SCRIPT_DIR, "Frontend_RaspberryPi/Services/weather_api.py"),
-    os.path.join(SCRIPT_DIR, "Frontend_RaspberryPi/main_CLI.py"),
+    os.path.join(SCRIPT_DIR, "Frontend_RaspberryPi/Services/api_client.py"),
 ]
 
 def select_ip():